@@ -0,0 +1,139 @@
+"""
+Нагрузочный тест и микробенчмарки API.
+
+    python -m benchmarks --concurrency 1 10 50 --requests 500 --latency 0.05 --output report.json
+    python -m benchmarks --baseline report.json --max-regression 0.2
+
+Приложение src.main.app и фейковый внешний API работают в этом же процессе через ASGI,
+поэтому результаты сравнимы между запусками на одной машине, но не с боевым uvicorn.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+DEFAULT_SCENARIOS = ['currencies', 'rates', 'convert', 'login', 'refresh', 'read_current_user']
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Load test and micro-benchmarks for the API')
+    parser.add_argument('--scenarios', nargs='+', default=DEFAULT_SCENARIOS, choices=DEFAULT_SCENARIOS)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 10, 50])
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario and concurrency level')
+    parser.add_argument('--login-requests', type=int, default=50, help='requests for the bcrypt-bound login scenario')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake currency API latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='fake currency API latency jitter in seconds')
+    parser.add_argument('--micro-calls', type=int, default=20000, help='calls per micro-benchmark, 0 to skip')
+    parser.add_argument('--output', default='benchmark-report.json')
+    parser.add_argument('--baseline', help='previous report to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed RPS drop / p99 growth, fraction')
+    return parser.parse_args(argv)
+
+
+def configure_environment() -> None:
+    """
+    Настройки по умолчанию для прогона: отдельная БД SQLite во временном каталоге и адрес
+    фейкового API. Переменные окружения, заданные явно, имеют приоритет.
+    """
+    os.environ.setdefault('CURRENCY_API_KEY', 'benchmark')
+    os.environ.setdefault('CURRENCY_API_URL', 'http://fake-currency-api/')
+    if 'DATABASE_URL' not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix='benchmarks-'), 'benchmark.db')
+        os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{path}'
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    from benchmarks.fake_api import FakeCurrencyApi
+    from benchmarks.load import BenchmarkSession, benchmark_app, run_load
+    from benchmarks.micro import run_micro
+    from src.db import engine
+
+    fake_api = FakeCurrencyApi(latency=args.latency, jitter=args.jitter, seed=0)
+    async with benchmark_app(fake_api) as client:
+        session = BenchmarkSession(client)
+        results = await run_load(
+            client,
+            scenarios=args.scenarios,
+            concurrency_levels=args.concurrency,
+            requests=args.requests,
+            cpu_bound_requests=args.login_requests,
+            warmup=args.warmup,
+            session=session,
+            engine=engine,
+        )
+        metrics = (await client.get('/metrics', headers=session.headers)).json()
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {
+            'scenarios': args.scenarios,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'login_requests': args.login_requests,
+            'warmup': args.warmup,
+        },
+        'upstream': fake_api.stats(),
+        'results': results,
+        'micro': run_micro(args.micro_calls) if args.micro_calls else [],
+        'metrics': metrics,
+    }
+
+
+def print_summary(report: dict[str, Any]) -> None:
+    print(f"{'scenario':<20}{'conc':>6}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'sql/req':>9}")
+    for result in report['results']:
+        latency = result['latency_ms']
+        queries = result.get('queries_per_request')
+        print(
+            f"{result['scenario']:<20}{result['concurrency']:>6}{result['rps']:>10.1f}"
+            f"{latency['p50']:>10.2f}{latency['p99']:>10.2f}{result['errors']:>8}"
+            + (f'{queries:>9.2f}' if queries is not None else f"{'-':>9}")
+        )
+    for micro in report['micro']:
+        print(f"{micro['name']:<50}{micro['ops_per_second']:>14.0f} ops/s{micro['mean_us']:>10.2f} us")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    configure_environment()
+    report = asyncio.run(run(args))
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print_summary(report)
+    print(f'Report written to {args.output}')
+
+    if args.baseline:
+        from benchmarks.load import compare_reports
+
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare_reports(report, json.load(file), args.max_regression)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
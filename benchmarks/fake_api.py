@@ -0,0 +1,86 @@
+import asyncio
+import random
+import time
+from typing import Any, Optional
+
+from fastapi import FastAPI, Query
+
+
+# Курсы к USD, близкие к реальным: ответы фейкового API выглядят как ответы apilayer currency_data.
+USD_RATES = {
+    'USD': 1.0, 'EUR': 0.895, 'GBP': 0.752, 'JPY': 145.6, 'CHF': 0.836, 'CNY': 7.21,
+    'RUB': 80.37, 'CAD': 1.39, 'AUD': 1.56, 'NZD': 1.69, 'SEK': 9.72, 'NOK': 10.38,
+    'DKK': 6.68, 'PLN': 3.82, 'CZK': 22.4, 'HUF': 361.2, 'TRY': 38.8, 'INR': 85.4,
+    'BRL': 5.67, 'MXN': 19.5, 'ZAR': 18.1, 'KRW': 1395.0, 'SGD': 1.30, 'HKD': 7.83,
+    'AED': 3.67, 'ILS': 3.56, 'THB': 33.2, 'KZT': 512.0, 'UAH': 41.5, 'GEL': 2.74,
+}
+
+
+class FakeCurrencyApi:
+    """
+    Локальная замена внешнего API курсов: эндпоинты list, live и convert с задержкой
+    latency ± jitter секунд на каждый ответ. Считает обращения, чтобы в отчёте было видно,
+    сколько запросов к API пришлось на нагрузку.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: dict[str, int] = {'list': 0, 'live': 0, 'convert': 0}
+        self._random = random.Random(seed)
+        self.app = self._create_app()
+
+    def stats(self) -> dict[str, Any]:
+        return {'latency_seconds': self.latency, 'jitter_seconds': self.jitter, 'calls': dict(self.calls)}
+
+    def reset(self) -> None:
+        self.calls = dict.fromkeys(self.calls, 0)
+
+    async def _respond(self, endpoint: str) -> None:
+        self.calls[endpoint] += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title='Fake currency API')
+
+        @app.get('/list')
+        async def currencies() -> dict[str, Any]:
+            await self._respond('list')
+            return {'success': True, 'currencies': {code: code for code in USD_RATES}}
+
+        @app.get('/live')
+        async def live(source: str = 'USD', currencies: Optional[str] = None) -> dict[str, Any]:
+            await self._respond('live')
+            if source not in USD_RATES:
+                return {'success': False, 'error': {'code': 201, 'info': 'Invalid source currency'}}
+            codes = currencies.split(',') if currencies else list(USD_RATES)
+            return {
+                'success': True,
+                'timestamp': int(time.time()),
+                'source': source,
+                'quotes': {
+                    f'{source}{code}': USD_RATES[code] / USD_RATES[source]
+                    for code in codes if code in USD_RATES
+                },
+            }
+
+        @app.get('/convert')
+        async def convert(
+                amount: float,
+                from_currency: str = Query(alias='from'),
+                to_currency: str = Query(alias='to'),
+        ) -> dict[str, Any]:
+            await self._respond('convert')
+            if from_currency not in USD_RATES or to_currency not in USD_RATES:
+                return {'success': False, 'error': {'code': 402, 'info': 'Invalid currency'}}
+            quote = USD_RATES[to_currency] / USD_RATES[from_currency]
+            return {
+                'success': True,
+                'query': {'from': from_currency, 'to': to_currency, 'amount': amount},
+                'info': {'timestamp': int(time.time()), 'quote': quote},
+                'result': amount * quote,
+            }
+
+        return app
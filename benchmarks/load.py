@@ -0,0 +1,301 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.fake_api import FakeCurrencyApi
+
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class BenchmarkSession:
+    """
+    Клиент приложения с зарегистрированным пользователем: access токен для защищённых эндпоинтов
+    и по одному refresh токену на каждого виртуального пользователя (они одноразовые).
+    """
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.username = f'bench_{uuid.uuid4().hex[:16]}'
+        self.access_token: Optional[str] = None
+        self.refresh_tokens: list[str] = []
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {'Authorization': f'Bearer {self.access_token}'}
+
+    async def setup(self) -> None:
+        """Регистрирует пользователя и получает access токен."""
+        response = await self.client.post('/auth/register', json={
+            'first_name': 'Benchmark',
+            'last_name': 'User',
+            'username': self.username,
+            'email': f'{self.username}@example.com',
+            'password': BENCHMARK_PASSWORD,
+        })
+        response.raise_for_status()
+        self.access_token = (await self.login()).json()['access_token']
+
+    async def login(self) -> httpx.Response:
+        response = await _login(self, 0)
+        response.raise_for_status()
+        return response
+
+    async def ensure_refresh_tokens(self, count: int) -> None:
+        """Выдаёт недостающие refresh токены до начала замера."""
+        while len(self.refresh_tokens) < count:
+            self.refresh_tokens.append((await self.login()).json()['refresh_token'])
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Сценарий нагрузки: один запрос виртуального пользователя с номером worker."""
+
+    name: str
+    send: Callable[[BenchmarkSession, int], Awaitable[httpx.Response]]
+    prepare: Optional[Callable[[BenchmarkSession, int], Awaitable[None]]] = None
+
+
+async def _currencies(session: BenchmarkSession, worker: int) -> httpx.Response:
+    return await session.client.get('/currencies', headers=session.headers)
+
+
+async def _rates(session: BenchmarkSession, worker: int) -> httpx.Response:
+    return await session.client.get(
+        '/currencies/rates',
+        params=[('source', 'USD'), ('currencies', 'EUR'), ('currencies', 'GBP'), ('currencies', 'JPY')],
+        headers=session.headers,
+    )
+
+
+async def _convert(session: BenchmarkSession, worker: int) -> httpx.Response:
+    return await session.client.get(
+        '/currencies/convert',
+        params={'amount': 100, 'from_currency': 'EUR', 'to_currency': 'JPY'},
+        headers=session.headers,
+    )
+
+
+async def _login(session: BenchmarkSession, worker: int) -> httpx.Response:
+    return await session.client.post(
+        '/auth/token',
+        data={'username': session.username, 'password': BENCHMARK_PASSWORD},
+    )
+
+
+async def _refresh(session: BenchmarkSession, worker: int) -> httpx.Response:
+    response = await session.client.post(
+        '/auth/refresh',
+        json={'refresh_token': session.refresh_tokens[worker]},
+    )
+    if response.status_code == 200:
+        session.refresh_tokens[worker] = response.json()['refresh_token']
+    return response
+
+
+async def _read_current_user(session: BenchmarkSession, worker: int) -> httpx.Response:
+    return await session.client.get('/auth/read_current_user', headers=session.headers)
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario('currencies', _currencies),
+        Scenario('rates', _rates),
+        Scenario('convert', _convert),
+        Scenario('login', _login),
+        Scenario('refresh', _refresh, prepare=BenchmarkSession.ensure_refresh_tokens),
+        Scenario('read_current_user', _read_current_user),
+    )
+}
+
+# Вход упирается в bcrypt, поэтому для него используется отдельное (меньшее) число запросов.
+CPU_BOUND_SCENARIOS = frozenset({'login'})
+
+# Для сценариев авторизации в отчёт пишется число SQL-запросов на один запрос к API.
+AUTH_SCENARIOS = frozenset({'login', 'refresh', 'read_current_user'})
+
+
+class QueryCounter:
+    """Считает SQL-запросы движка БД через событие before_cursor_execute."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine.sync_engine
+        self.count = 0
+
+    def __enter__(self) -> 'QueryCounter':
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args) -> None:
+        self.count += 1
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Перцентиль по ближайшему рангу (как в LatencyTracker)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def run_level(
+        session: BenchmarkSession,
+        scenario: Scenario,
+        concurrency: int,
+        requests: int,
+        queries: Optional[QueryCounter] = None,
+) -> dict[str, Any]:
+    """
+    Выполняет requests запросов сценария силами concurrency виртуальных пользователей
+    (каждый отправляет следующий запрос сразу после ответа) и возвращает сводку замера.
+    Со счётчиком queries для сценариев авторизации добавляется queries_per_request.
+    """
+    if scenario.prepare is not None:
+        await scenario.prepare(session, concurrency)
+    queries_before = queries.count if queries is not None else 0
+
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    remaining = iter(range(requests))
+
+    async def worker(index: int) -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario.send(session, index)
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+            # Ответ из кэша может прийти без единого переключения задач; без этого один
+            # виртуальный пользователь выбрал бы все запросы, и параллельности бы не было.
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'scenario': scenario.name,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(count for code, count in statuses.items() if not code.startswith('2')),
+        'status_codes': dict(statuses),
+        'seconds': elapsed,
+        'rps': requests / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000,
+            'p50': percentile(latencies, 50) * 1000,
+            'p90': percentile(latencies, 90) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000,
+        },
+    }
+    if queries is not None and scenario.name in AUTH_SCENARIOS:
+        result['queries_per_request'] = (queries.count - queries_before) / requests
+    return result
+
+
+async def run_load(
+        client: httpx.AsyncClient,
+        scenarios: Iterable[str],
+        concurrency_levels: Iterable[int],
+        requests: int,
+        cpu_bound_requests: int,
+        warmup: int = 10,
+        session: Optional[BenchmarkSession] = None,
+        engine: Optional[AsyncEngine] = None,
+) -> list[dict[str, Any]]:
+    """
+    Прогоняет сценарии на всех уровнях параллельности. Перед замером каждого сценария
+    выполняется warmup запросов, чтобы заполнить кэши и пулы соединений. С движком БД
+    engine для сценариев авторизации считается число SQL-запросов на запрос.
+    """
+    session = session or BenchmarkSession(client)
+    await session.setup()
+
+    queries = QueryCounter(engine) if engine is not None else None
+    results = []
+    with queries or nullcontext():
+        for name in scenarios:
+            scenario = SCENARIOS[name]
+            count = cpu_bound_requests if name in CPU_BOUND_SCENARIOS else requests
+            if warmup:
+                await run_level(session, scenario, 1, min(warmup, count))
+            for concurrency in concurrency_levels:
+                results.append(await run_level(session, scenario, concurrency, count, queries))
+    return results
+
+
+@asynccontextmanager
+async def benchmark_app(fake_api: FakeCurrencyApi) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Поднимает src.main.app со своим lifespan, но с клиентом внешнего API, который ходит
+    в фейковый API через ASGI. Схема БД создаётся по моделям, если таблиц ещё нет.
+    """
+    from src.config import settings
+    from src.db import Base, engine
+    from src.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    def create_fake_api_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=fake_api.app),
+            headers={'apikey': settings.CURRENCY_API_KEY},
+        )
+
+    with patch('src.main.create_api_client', create_fake_api_client):
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app),
+                    base_url='http://benchmark',
+                    timeout=60.0,
+            ) as client:
+                yield client
+    await engine.dispose()
+
+
+def compare_reports(
+        report: dict[str, Any],
+        baseline: dict[str, Any],
+        max_regression: float,
+) -> list[str]:
+    """
+    Сравнивает отчёт с базовым: регрессией считается падение RPS или рост p99 больше чем
+    на долю max_regression, а также появление ошибок и рост числа SQL-запросов на запрос.
+    Возвращает описания регрессий.
+    """
+    previous = {(result['scenario'], result['concurrency']): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        key = (result['scenario'], result['concurrency'])
+        before = previous.get(key)
+        if before is None:
+            continue
+        label = f'{key[0]} x{key[1]}'
+        if result['rps'] < before['rps'] * (1 - max_regression):
+            regressions.append(f"{label}: RPS {before['rps']:.1f} -> {result['rps']:.1f}")
+        if result['latency_ms']['p99'] > before['latency_ms']['p99'] * (1 + max_regression):
+            regressions.append(
+                f"{label}: p99 {before['latency_ms']['p99']:.1f} ms -> {result['latency_ms']['p99']:.1f} ms"
+            )
+        if result['errors'] > before['errors']:
+            regressions.append(f"{label}: errors {before['errors']} -> {result['errors']}")
+        if result.get('queries_per_request', 0) > before.get('queries_per_request', float('inf')):
+            regressions.append(
+                f"{label}: queries per request {before['queries_per_request']:.2f} -> {result['queries_per_request']:.2f}"
+            )
+    return regressions
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+from typing import Any, Callable
+
+import jwt
+
+from benchmarks.fake_api import USD_RATES
+from src.auth.cache import access_token_cache
+from src.auth.security import create_access_token, verify_access_token
+from src.cache_backends import cache_key, pack_entry, unpack_entry
+from src.config import settings
+from src.currency.converter import ConversionEngine
+from src.currency.export import CONVERSION_COLUMNS, encode_rows
+
+
+def measure(name: str, func: Callable[[], Any], number: int) -> dict[str, Any]:
+    """Вызывает func number раз подряд и возвращает пропускную способность и среднее время вызова."""
+    func()
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    elapsed = time.perf_counter() - started
+    return {
+        'name': name,
+        'calls': number,
+        'ops_per_second': number / elapsed if elapsed else 0.0,
+        'mean_us': elapsed / number * 1_000_000,
+    }
+
+
+def run_micro(number: int) -> list[dict[str, Any]]:
+    """Микробенчмарки функций горячего пути: проверка токена, конвертация, сериализация и ключи кэша."""
+    engine = ConversionEngine()
+    engine.load({
+        'timestamp': int(time.time()),
+        'source': 'USD',
+        'quotes': {f'USD{code}': rate for code, rate in USD_RATES.items()},
+    })
+    batch = [(100.0, 'EUR', code) for code in USD_RATES] * 4
+    rows = engine.convert_batch(batch)
+    export_rows = [
+        {
+            'amount': row['query']['amount'],
+            'from': row['query']['from'],
+            'to': row['query']['to'],
+            'quote': row['info']['quote'],
+            'result': row['result'],
+            'error': row['error'],
+        }
+        for row in rows
+    ]
+    token = create_access_token('benchmark', 1, timedelta(minutes=15))
+    entry = pack_entry(b'{"success":true}')
+
+    access_token_cache.clear()
+    try:
+        return [
+            measure('verify_access_token (cached)', lambda: verify_access_token(token), number),
+            measure(
+                'jwt.decode',
+                lambda: jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]),
+                number,
+            ),
+            measure('ConversionEngine.convert', lambda: engine.convert(100.0, 'EUR', 'JPY'), number),
+            measure(f'ConversionEngine.convert_batch ({len(batch)} items)', lambda: engine.convert_batch(batch), number // 10 or 1),
+            measure(
+                f'encode_rows ndjson ({len(export_rows)} rows)',
+                lambda: encode_rows(export_rows, 'ndjson', CONVERSION_COLUMNS),
+                number // 10 or 1,
+            ),
+            measure(
+                f'encode_rows csv ({len(export_rows)} rows)',
+                lambda: encode_rows(export_rows, 'csv', CONVERSION_COLUMNS),
+                number // 10 or 1,
+            ),
+            measure('cache_key', lambda: cache_key('rates', ['USD', ['EUR', 'GBP']]), number),
+            measure('pack_entry + unpack_entry', lambda: unpack_entry(pack_entry(entry)), number),
+        ]
+    finally:
+        access_token_cache.clear()
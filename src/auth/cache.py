@@ -0,0 +1,235 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import orjson
+from sqlalchemy import event
+
+from src.auth.models import User
+from src.cache_backends import CacheBackend, cache_key, pack_entry, shared_cache, unpack_entry
+from src.config import settings
+
+
+USER_FIELDS = ('id', 'first_name', 'last_name', 'username', 'email', 'is_active')
+
+
+class UserCache:
+    """
+    Кэш пользователей с коротким TTL и ограниченным размером.
+    Хранит только поля, нужные для авторизации и ответа, без хэша пароля.
+    С общим хранилищем (backend) локальный промах проверяется в нём, и записи видны всем воркерам.
+    """
+
+    def __init__(self, ttl: float, max_size: int, backend: Optional[CacheBackend] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.backend = backend
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._pending: set[asyncio.Task] = set()
+
+    async def get(self, user_id: int) -> Optional[User]:
+        """Возвращает отсоединённый от сессии объект User или None, если записи нет."""
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            self._entries.pop(user_id, None)
+            entry = await self._get_shared(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._remember(user_id, entry)
+        else:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+        return User(**entry[1])
+
+    async def set(self, user: User) -> None:
+        """Сохраняет снимок полей пользователя."""
+        snapshot = {field: getattr(user, field) for field in USER_FIELDS}
+        self._remember(user.id, (time.monotonic(), snapshot))
+        if self.backend is not None:
+            await self.backend.set(cache_key('users', user.id), pack_entry(orjson.dumps(snapshot)), self.ttl)
+
+    def invalidate(self, user_id: int) -> None:
+        """Удаляет пользователя из кэша; из общего хранилища — фоновой задачей."""
+        self._entries.pop(user_id, None)
+        if self.backend is None:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self.backend.delete(cache_key('users', user_id)))
+        except RuntimeError:
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики попаданий и промахов."""
+        return {
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+        }
+
+    def clear(self) -> None:
+        """Очищает локальные записи и счётчики."""
+        self._entries.clear()
+        self.hits = self.shared_hits = self.misses = 0
+
+    async def _get_shared(self, user_id: int) -> Optional[tuple[float, dict[str, Any]]]:
+        if self.backend is None:
+            return None
+        data = await self.backend.get(cache_key('users', user_id))
+        if data is None:
+            return None
+        stored_at, payload = unpack_entry(data)
+        return time.monotonic() - max(0.0, time.time() - stored_at), orjson.loads(payload)
+
+    def _remember(self, user_id: int, entry: tuple[float, dict[str, Any]]) -> None:
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class TokenCache:
+    """
+    LRU-кэш проверенных access токенов по SHA-256 дайджесту токена.
+    Запись хранит exp токена, поэтому срок действия проверяется и при попадании.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[int, dict[str, Any]]] = OrderedDict()
+
+    def get(self, digest: bytes) -> Optional[tuple[int, dict[str, Any]]]:
+        """Возвращает (exp, данные пользователя) или None."""
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+        return entry
+
+    def set(self, digest: bytes, expire: int, payload: dict[str, Any]) -> None:
+        """Сохраняет результат проверки токена до его exp."""
+        self._entries[digest] = (expire, payload)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, digest: bytes) -> None:
+        """Удаляет токен из кэша."""
+        self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._entries.clear()
+
+
+class TokenRevocations:
+    """
+    Компактная карта отзыва access токенов: user_id -> (время проверки, момент отзыва или None).
+
+    Токены, выпущенные (iat) в секунду отзыва или раньше, отклоняются без обращения к БД.
+    Деактивация через ORM в этом процессе отзывает токены сразу; запись каждого пользователя
+    перепроверяется в БД не реже раза в check_interval секунд, поэтому изменения в обход ORM
+    или в другом воркере вступают в силу не позже чем через check_interval.
+    """
+
+    def __init__(self, check_interval: float, max_size: int):
+        self.check_interval = check_interval
+        self.max_size = max_size
+        self.hits = 0
+        self.checks = 0
+        self.rejected = 0
+        self._entries: OrderedDict[int, tuple[float, Optional[int]]] = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[tuple[float, Optional[int]]]:
+        """Возвращает запись или None, если её нет или пора перепроверить пользователя в БД."""
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[0] >= self.check_interval:
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry
+
+    def record(self, user_id: int, is_active: bool) -> tuple[float, Optional[int]]:
+        """
+        Сохраняет результат проверки в БД. Неактивный или удалённый пользователь отзывает все
+        токены; после повторной активации ранее отозванные токены остаются недействительными.
+        """
+        self.checks += 1
+        previous = self._entries.get(user_id)
+        revoked_at = previous[1] if previous is not None else None
+        if not is_active:
+            revoked_at = int(time.time())
+        return self._remember(user_id, (time.monotonic(), revoked_at))
+
+    def revoke(self, user_id: int) -> None:
+        """Отзывает все access токены пользователя, выпущенные до текущего момента."""
+        self._remember(user_id, (time.monotonic(), int(time.time())))
+
+    def is_revoked(self, entry: tuple[float, Optional[int]], issued_at: int) -> bool:
+        """Отозван ли токен с данным iat."""
+        revoked = entry[1] is not None and issued_at <= entry[1]
+        self.rejected += revoked
+        return revoked
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики проверок и размер карты."""
+        return {
+            'hits': self.hits,
+            'checks': self.checks,
+            'rejected': self.rejected,
+            'revoked_users': sum(entry[1] is not None for entry in self._entries.values()),
+            'size': len(self._entries),
+        }
+
+    def clear(self) -> None:
+        """Очищает карту и счётчики."""
+        self._entries.clear()
+        self.hits = self.checks = self.rejected = 0
+
+    def _remember(self, user_id: int, entry: tuple[float, Optional[int]]) -> tuple[float, Optional[int]]:
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    backend=shared_cache,
+)
+
+access_token_cache = TokenCache(max_size=settings.ACCESS_TOKEN_CACHE_SIZE)
+
+token_revocations = TokenRevocations(
+    check_interval=settings.TOKEN_REVOCATION_CHECK_SECONDS,
+    max_size=settings.TOKEN_REVOCATION_MAX_SIZE,
+)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Сбрасывает кэш при любом изменении или удалении пользователя через ORM."""
+    user_cache.invalidate(target.id)
+
+
+@event.listens_for(User, 'after_update')
+def revoke_deactivated_user_tokens(mapper, connection, target: User) -> None:
+    """Деактивация пользователя через ORM сразу отзывает его access токены."""
+    if not target.is_active:
+        token_revocations.revoke(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def revoke_deleted_user_tokens(mapper, connection, target: User) -> None:
+    """Удаление пользователя через ORM сразу отзывает его access токены."""
+    token_revocations.revoke(target.id)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.config import settings
+
+
+bcrypt_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+def hash_password_sync(password: str) -> str:
+    """Синхронное хэширование пароля (выполняется в пуле)."""
+    return bcrypt_context.hash(password)
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    """Синхронная проверка пароля (выполняется в пуле)."""
+    return bcrypt_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в пуле потоков или процессов, не блокируя цикл событий.
+    Число одновременных операций ограничено числом воркеров, очередь ожидания ограничена max_queue.
+    """
+
+    def __init__(self, executor_type: str, workers: int, max_queue: int):
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(workers)
+
+    async def hash(self, password: str) -> str:
+        """Хэширует пароль в пуле."""
+        return await self._run(hash_password_sync, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Проверяет пароль в пуле."""
+        return await self._run(verify_password_sync, password, hashed_password)
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики очереди: глубина, активные операции и время ожидания."""
+        return {
+            'queued': self.queued,
+            'active': self.active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_seconds': self.total_wait / self.completed if self.completed else 0.0,
+            'max_wait_seconds': self.max_wait,
+        }
+
+    def shutdown(self) -> None:
+        """Останавливает пул воркеров."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Too many authentication requests, try again later'
+            )
+
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        wait = time.monotonic() - started
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hasher',
+                )
+        return self._executor
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -5,6 +5,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    LargeBinary,
 )
 from sqlalchemy.orm import relationship
 
@@ -34,8 +35,8 @@ class RefreshToken(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), index=True, nullable=False)
-    token = Column(String(256), unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    token_hash = Column(LargeBinary(32), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
     is_revoked = Column(Boolean, default=False)
 
     user = relationship(
@@ -2,7 +2,7 @@ from datetime import timedelta, datetime, timezone
 
 from fastapi import APIRouter, Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
@@ -10,14 +10,16 @@ from src.auth.models import User
 from src.auth.schemas import CreateUser, TokenResponse, RefreshRequest, ReadUser
 from src.config import settings
 from src.db_depends import get_session
-from src.auth.security import bcrypt_context
+from src.auth.hashing import password_hasher
 from src.auth.models import RefreshToken
 from src.auth.security import (
     authenticate_user,
     create_access_token,
+    consume_refresh_token,
     create_refresh_token,
-    verify_refresh_token,
-    get_current_user
+    decode_refresh_token,
+    hash_token,
+    get_current_user_profile
 )
 
 
@@ -47,9 +49,9 @@ async def login_for_access_token(
         expires_delta=refresh_token_expires
     )
 
-    expires_at = datetime.now(timezone.utc) + refresh_token_expires
+    expires_at = (datetime.now(timezone.utc) + refresh_token_expires).replace(tzinfo=None)
     db_token = RefreshToken(
-        token=refresh_token,
+        token_hash=hash_token(refresh_token),
         user_id=user.id,
         expires_at=expires_at
     )
@@ -68,22 +70,14 @@ async def refresh_access_token(
         body: RefreshRequest,
         db: AsyncSession = Depends(get_session)
 ):
-    """Обновление access и refresh токена (рефреш токен инвалидируется после использования)."""
-    info = await verify_refresh_token(body.refresh_token, db)
-
-    old_token = await db.scalar(
-        select(RefreshToken).where(
-            RefreshToken.token == body.refresh_token,
-            RefreshToken.is_revoked == False
-        )
-    )
-
-    if old_token:
-        old_token.is_revoked = True
+    """
+    Обновление access и refresh токена (рефреш токен инвалидируется после использования).
+    Отзыв старого и запись нового токена выполняются одной транзакцией.
+    """
+    payload = decode_refresh_token(body.refresh_token)
+    user = await consume_refresh_token(body.refresh_token, payload['id'], db)
+    if not user.is_active:
         await db.commit()
-
-    user = await db.scalar(select(User).where(User.id == info['id']))
-    if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
@@ -103,9 +97,9 @@ async def refresh_access_token(
         expires_delta=refresh_token_expires
     )
 
-    expires_at = datetime.now(timezone.utc) + refresh_token_expires
+    expires_at = (datetime.now(timezone.utc) + refresh_token_expires).replace(tzinfo=None)
     db_refresh_token = RefreshToken(
-        token=refresh_token,
+        token_hash=hash_token(refresh_token),
         user_id=user.id,
         expires_at=expires_at
     )
@@ -124,25 +118,23 @@ async def create_user(
     db: Annotated[AsyncSession, Depends(get_session)],
     user: CreateUser
 ):
-    """Регистрация нового пользователя."""
-    exist = await db.scalar(select(User).where(
-        (User.username == user.username) | (User.email == user.email)
-    ))
-    if exist:
-        raise HTTPException(status_code=400, detail='User already exists')
-
+    """Регистрация нового пользователя (уникальность проверяется ограничениями БД)."""
     db.add(User(
         first_name=user.first_name,
         last_name=user.last_name,
         username=user.username,
         email=user.email,
-        hashed_password=bcrypt_context.hash(user.password),
+        hashed_password=await password_hasher.hash(user.password),
     ))
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail='User already exists')
     return {'transaction': 'Successful'}
 
 
 @auth_router.get('/read_current_user', response_model=ReadUser)
-async def read_current_user(current_user: Annotated[User, Depends(get_current_user)]):
+async def read_current_user(current_user: Annotated[User, Depends(get_current_user_profile)]):
     """Вернуть текущего пользователя (по access токену)."""
     return current_user
@@ -1,20 +1,23 @@
+import hashlib
+import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 import jwt
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Row, select, update
 
+from src.db import async_session_maker
 from src.db_depends import get_session
 from src.config import settings
+from src.auth.cache import access_token_cache, token_revocations, user_cache
+from src.auth.hashing import password_hasher
 from src.auth.models import User
 from src.auth.models import RefreshToken
 
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 CREDENTIALS_EXCEPTION = HTTPException(
@@ -23,17 +26,28 @@ CREDENTIALS_EXCEPTION = HTTPException(
     headers={'WWW-Authenticate': 'Bearer'}
 )
 
+ACCESS_TOKEN_EXPIRED_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail='Access token expired!',
+    headers={'WWW-Authenticate': 'Bearer'}
+)
+
 
 async def authenticate_user(
         db: Annotated[AsyncSession, Depends(get_session)],
         username: str,
         password: str
-) -> User:
+) -> Row:
     """
-    Проверяет имя пользователя и пароль, возвращает пользователя, если всё ок.
+    Проверяет имя пользователя и пароль, возвращает строку (id, username), если всё ок.
+    Соединение с БД освобождается до проверки bcrypt, которая выполняется в пуле.
     """
-    user = await db.scalar(select(User).where(User.username == username))
-    if not user or not bcrypt_context.verify(password, user.hashed_password) or not user.is_active:
+    user = (await db.execute(
+        select(User.id, User.username, User.hashed_password, User.is_active)
+        .where(User.username == username)
+    )).first()
+    await db.rollback()
+    if not user or not await password_hasher.verify(password, user.hashed_password) or not user.is_active:
         raise HTTPException (
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid authentication credentials',
@@ -50,12 +64,17 @@ def create_token(
 ) -> str:
     """
     Универсальная функция создания access/refresh токена.
+    Случайный jti делает токены уникальными, даже если они выпущены в одну секунду;
+    по iat access токены сверяются с картой отзыва.
     """
+    now = datetime.now(timezone.utc)
     payload = {
         'sub': username,
         'id': user_id,
-        'exp': int((datetime.now(timezone.utc) + expires_delta).timestamp()),
+        'iat': int(now.timestamp()),
+        'exp': int((now + expires_delta).timestamp()),
         'token_type': token_type,
+        'jti': secrets.token_urlsafe(12),
     }
 
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
@@ -74,7 +93,17 @@ def create_refresh_token(username: str, user_id: int, expires_delta: timedelta)
 def verify_access_token(token: str) -> dict:
     """
     Проверяет access токен. Возвращает данные пользователя.
+    Уже проверенные токены берутся из кэша по дайджесту до истечения их exp.
     """
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = access_token_cache.get(digest)
+    if cached is not None:
+        expire, user_data = cached
+        if expire < datetime.now(timezone.utc).timestamp():
+            access_token_cache.invalidate(digest)
+            raise ACCESS_TOKEN_EXPIRED_EXCEPTION
+        return dict(user_data)
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         if payload.get('token_type') != 'access':
@@ -89,86 +118,114 @@ def verify_access_token(token: str) -> dict:
         if expire < datetime.now(timezone.utc).timestamp():
             raise CREDENTIALS_EXCEPTION
 
-        return {'username': username, 'id': user_id}
+        user_data = {'username': username, 'id': user_id, 'iat': payload.get('iat', 0)}
+        access_token_cache.set(digest, expire, user_data)
+        return dict(user_data)
 
     except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Access token expired!',
-            headers={'WWW-Authenticate': 'Bearer'}
-        )
+        raise ACCESS_TOKEN_EXPIRED_EXCEPTION
 
     except jwt.PyJWTError:
         raise CREDENTIALS_EXCEPTION
 
 
-async def verify_refresh_token(refresh_token: str, db: AsyncSession) -> dict:
+def hash_token(token: str) -> bytes:
+    """SHA-256 дайджест токена: по нему refresh токены хранятся и ищутся в БД."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def decode_refresh_token(refresh_token: str) -> dict:
     """
-    Проверяет refresh токен, возвращает словарь с username и id, если всё ок.
+    Проверяет подпись, тип и срок действия refresh токена, возвращает его payload.
     """
     try:
         payload = jwt.decode(refresh_token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        if payload.get('token_type') != 'refresh':
-            raise CREDENTIALS_EXCEPTION
-
-        if payload.get('sub') is None or payload.get('id') is None:
-            raise CREDENTIALS_EXCEPTION
-
-        expire = payload.get('exp')
-        if expire is None or expire < datetime.now(timezone.utc).timestamp():
-            raise CREDENTIALS_EXCEPTION
-
-        db_token = await db.scalar(
-            select(RefreshToken).where(
-                RefreshToken.token == refresh_token,
-                RefreshToken.is_revoked == False
-            )
-        )
-
-        if not db_token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Refresh token not found or revoked'
-            )
-        expires_at = db_token.expires_at
-        if not expires_at.tzinfo:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-
-        if expires_at < datetime.now(timezone.utc):
-            db_token.is_revoked = True
-            await db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Refresh token expired in database'
-            )
-
-        return {
-            'username': payload['sub'],
-            'id': payload['id']
-        }
-
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Refresh token expired!'
         )
-
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid refresh token'
         )
 
+    if payload.get('token_type') != 'refresh':
+        raise CREDENTIALS_EXCEPTION
+
+    if payload.get('sub') is None or payload.get('id') is None:
+        raise CREDENTIALS_EXCEPTION
+
+    expire = payload.get('exp')
+    if expire is None or expire < datetime.now(timezone.utc).timestamp():
+        raise CREDENTIALS_EXCEPTION
+    return payload
+
+
+async def consume_refresh_token(refresh_token: str, user_id: int, db: AsyncSession) -> Row:
+    """
+    Отзывает действующий refresh токен одним UPDATE ... RETURNING и возвращает строку
+    пользователя (id, username, is_active). Повторное или одновременное использование
+    токена находит уже отозванную запись и получает 401. Транзакцию фиксирует вызывающий код.
+    """
+    user_column = lambda column: select(column).where(User.id == RefreshToken.user_id).scalar_subquery()
+    user = (await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == hash_token(refresh_token),
+            RefreshToken.user_id == user_id,
+            RefreshToken.is_revoked == False,
+            RefreshToken.expires_at > datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        .values(is_revoked=True)
+        .returning(
+            RefreshToken.user_id.label('id'),
+            user_column(User.username).label('username'),
+            user_column(User.is_active).label('is_active'),
+        ),
+        execution_options={'synchronize_session': False},
+    )).first()
+
+    if not user:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Refresh token not found or revoked'
+        )
+    return user
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncSession = Depends(get_session)
-) -> User:
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
     """
-    Получает пользователя по access токену, используется как Depends.
+    Авторизует пользователя по access токену, используется как Depends.
+    Пользователь берётся из токена и проверяется по карте отзыва; БД запрашивается только
+    для пользователя без свежей записи в карте (одно поле is_active).
     """
     payload = verify_access_token(token)
-    user = await db.scalar(select(User).where(User.id == payload['id']))
+    entry = token_revocations.get(payload['id'])
+    if entry is None:
+        async with async_session_maker() as db:
+            is_active = await db.scalar(select(User.is_active).where(User.id == payload['id']))
+        entry = token_revocations.record(payload['id'], bool(is_active))
+
+    if token_revocations.is_revoked(entry, payload['iat']):
+        raise CREDENTIALS_EXCEPTION
+    return User(id=payload['id'], username=payload['username'], is_active=True)
+
+
+async def get_current_user_profile(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+    """
+    Полные данные авторизованного пользователя, используется как Depends.
+    Сессия БД открывается только при промахе кэша пользователей.
+    """
+    user = await user_cache.get(current_user.id)
+    if user is None:
+        async with async_session_maker() as db:
+            user = await db.scalar(select(User).where(User.id == current_user.id))
+        if user:
+            await user_cache.set(user)
+
     if not user or not user.is_active:
         raise CREDENTIALS_EXCEPTION
     return user
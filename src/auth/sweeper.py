@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.auth.models import RefreshToken
+from src.config import settings
+from src.db import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenSweeper:
+    """
+    Фоновая задача, удаляющая истёкшие и отозванные refresh токены пакетами по batch_size строк,
+    чтобы таблица и индексы не росли, а каждая транзакция оставалась короткой.
+    """
+
+    def __init__(self, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.deleted = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self, session_maker: async_sessionmaker = async_session_maker) -> int:
+        """Удаляет все просроченные и отозванные токены, возвращает число удалённых строк."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        batch = (
+            select(RefreshToken.id)
+            .where(or_(RefreshToken.expires_at < now, RefreshToken.is_revoked == True))
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        statement = delete(RefreshToken).where(RefreshToken.id.in_(batch))
+
+        total = 0
+        while True:
+            async with session_maker() as db:
+                result = await db.execute(statement, execution_options={'synchronize_session': False})
+                await db.commit()
+            total += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+        self.deleted += total
+        return total
+
+    def start(self) -> None:
+        """Запускает периодическую очистку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает периодическую очистку."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {'deleted': self.deleted}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.exception('Refresh token sweep failed: %s', e)
+
+
+refresh_token_sweeper = RefreshTokenSweeper(
+    batch_size=settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE,
+    interval=settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+)
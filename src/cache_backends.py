@@ -0,0 +1,151 @@
+import logging
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+import orjson
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_STORED_AT = struct.Struct('!d')
+
+
+def cache_key(namespace: str, key: Any) -> str:
+    """Строковый ключ общего хранилища: префикс приложения, пространство имён и ключ в JSON."""
+    return f'{settings.CACHE_KEY_PREFIX}{namespace}:{orjson.dumps(key).decode()}'
+
+
+def pack_entry(payload: bytes) -> bytes:
+    """Добавляет к сериализованному значению время записи (Unix time), общее для всех процессов."""
+    return _STORED_AT.pack(time.time()) + payload
+
+
+def unpack_entry(data: bytes) -> tuple[float, bytes]:
+    """Возвращает (время записи, сериализованное значение)."""
+    return _STORED_AT.unpack_from(data)[0], data[_STORED_AT.size:]
+
+
+class CacheBackend(ABC):
+    """
+    Общее для воркеров хранилище кэша: байтовые значения по строковым ключам с TTL.
+    Ошибки хранилища не должны доходить до вызывающего кода: get возвращает None, set и delete
+    ничего не делают.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Значение по ключу или None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Сохраняет значение на ttl секунд."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удаляет ключ."""
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+    async def close(self) -> None:
+        """Освобождает соединения."""
+
+
+class MemoryBackend(CacheBackend):
+    """Внутрипроцессная реализация с LRU-вытеснением: для одного процесса и для тестов."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {'size': len(self._entries)}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Реализация поверх клиента с протоколом Redis (redis.asyncio.Redis или совместимого).
+    Недоступность Redis считается промахом и учитывается в счётчике errors.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisBackend':
+        from redis import asyncio as redis
+
+        return cls(redis.from_url(
+            url,
+            socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+        ))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(key)
+        except Exception as e:
+            self._failed('get', e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._failed('set', e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(key)
+        except Exception as e:
+            self._failed('delete', e)
+
+    def stats(self) -> dict[str, Any]:
+        return {'errors': self.errors}
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning('Shared cache %s failed: %s', operation, error)
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """Общее хранилище кэша по настройке CACHE_BACKEND или None, если кэши только локальные."""
+    if settings.CACHE_BACKEND == 'redis':
+        return RedisBackend.from_url(settings.CACHE_REDIS_URL)
+    if settings.CACHE_BACKEND == 'memory':
+        return MemoryBackend(max_size=settings.CACHE_MEMORY_MAX_SIZE)
+    return None
+
+
+shared_cache = create_cache_backend()
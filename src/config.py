@@ -1,13 +1,86 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    DATABASE_URL: str = 'sqlite+aiosqlite:///./test.db'
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     JWT_SECRET_KEY: str = 'default_secret_key'
     JWT_ALGORITHM: str = 'HS256'
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 5
+    REFRESH_TOKEN_SWEEP_ENABLED: bool = True
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: float = 3600.0
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_REVOCATION_CHECK_SECONDS: float = 1.0
+    TOKEN_REVOCATION_MAX_SIZE: int = 100000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 100
+    CACHE_BACKEND: Literal['none', 'memory', 'redis'] = 'none'
+    CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+    CACHE_REDIS_TIMEOUT: float = 0.5
+    CACHE_KEY_PREFIX: str = 'currency_exchange:'
+    CACHE_MEMORY_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10000
     CURRENCY_API_KEY: str
     CURRENCY_API_URL: str
+    CURRENCY_API_TIMEOUT: float = 10.0
+    CURRENCY_API_CONNECT_TIMEOUT: float = 5.0
+    CURRENCY_API_MAX_CONNECTIONS: int = 100
+    CURRENCY_API_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    CURRENCY_API_KEEPALIVE_EXPIRY: float = 30.0
+    CURRENCY_API_HTTP2: bool = True
+    CURRENCY_API_RATE_LIMIT: float = 10.0
+    CURRENCY_API_BURST: int = 20
+    CURRENCY_API_MAX_CONCURRENCY: int = 20
+    CURRENCY_API_QUEUE_TIMEOUT: float = 5.0
+    CURRENCY_API_RETRIES: int = 2
+    CURRENCY_API_RETRY_BACKOFF: float = 0.1
+    CURRENCY_API_RETRY_MAX_BACKOFF: float = 2.0
+    CURRENCY_API_HEDGE_ENABLED: bool = False
+    CURRENCY_API_HEDGE_PERCENTILE: float = 95.0
+    CURRENCY_API_HEDGE_MIN_DELAY: float = 0.05
+    CURRENCY_API_BREAKER_THRESHOLD: int = 5
+    CURRENCY_API_BREAKER_RESET_SECONDS: float = 30.0
+    CURRENCY_PROVIDERS: list[str] = ['apilayer']
+    LOCAL_RATES_FILE: str = 'rates.json'
+    PROVIDER_HEALTH_WINDOW: int = 50
+    PROVIDER_MAX_ERROR_RATE: float = 0.5
+    PROVIDER_PROBE_INTERVAL_SECONDS: float = 30.0
+    CURRENCIES_CACHE_TTL_SECONDS: float = 6 * 60 * 60
+    RATES_CACHE_TTL_SECONDS: float = 10.0
+    RATES_CACHE_MAX_STALE_SECONDS: float = 300.0
+    RATES_CACHE_MAX_SIZE: int = 1024
+    RATES_MAX_SOURCES: int = 20
+    RATES_FANOUT_CONCURRENCY: int = 5
+    RATES_REFRESH_ENABLED: bool = False
+    RATES_REFRESH_SOURCES: list[str] = ['USD']
+    RATES_REFRESH_INTERVAL_SECONDS: float = 60.0
+    RATES_SNAPSHOT_MAX_AGE_SECONDS: float = 300.0
+    RATES_STREAM_INTERVAL_SECONDS: float = 5.0
+    RATES_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    RATES_STREAM_MAX_SUBSCRIBERS: int = 10000
+    RATE_HISTORY_ENABLED: bool = True
+    RATE_HISTORY_BATCH_SIZE: int = 500
+    RATE_HISTORY_FLUSH_INTERVAL_SECONDS: float = 5.0
+    RATE_HISTORY_MAX_BUFFER: int = 100000
+    FAST_JSON_RESPONSES: bool = False
+    CONVERT_BATCH_MAX_ITEMS: int = 10000
+    CONVERT_COLUMNAR_MAX_ITEMS: int = 1000000
+    CONVERT_STREAM_CHUNK_SIZE: int = 1000
+    CONVERT_STREAM_SPOOL_BYTES: int = 1024 * 1024
 
     model_config = SettingsConfigDict(env_file='.env')
 
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import orjson
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from src.cache_backends import CacheBackend, cache_key, pack_entry, shared_cache, unpack_entry
+from src.config import settings
+from src.currency.limiter import background_priority
+
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_UNAVAILABLE_CODES = frozenset({
+    status.HTTP_502_BAD_GATEWAY,
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+    status.HTTP_504_GATEWAY_TIMEOUT,
+})
+
+
+class RateCache:
+    """
+    Асинхронный LRU-кэш ответов внешнего API с TTL и stale-while-revalidate.
+
+    Просроченная запись отдаётся сразу, а её обновление выполняет одна фоновая задача.
+    Записи старше ttl + max_stale считаются отсутствующими и загружаются синхронно;
+    если внешний API при этом недоступен (502/503/504), отдаётся последнее сохранённое значение.
+    С общим хранилищем (backend) локальный промах сначала проверяется в нём, а загруженные
+    значения записываются туда для остальных воркеров.
+    """
+
+    def __init__(
+            self,
+            ttl: float,
+            max_size: int,
+            max_stale: float,
+            backend: Optional[CacheBackend] = None,
+            namespace: str = 'rates',
+            dump: Callable[[Any], bytes] = orjson.dumps,
+            load: Callable[[bytes], Any] = orjson.loads,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_stale = max_stale
+        self.backend = backend
+        self.namespace = namespace
+        self.dump = dump
+        self.load = load
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.shared_hits = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Возвращает значение по ключу, при необходимости загружая его через loader."""
+        entry = self._entries.get(key)
+        if self.backend is not None and (entry is None or time.monotonic() - entry[0] >= self.ttl):
+            shared = await self._get_shared(key)
+            if shared is not None and (entry is None or shared[0] > entry[0]):
+                self.shared_hits += 1
+                entry = shared
+                self._remember(key, entry)
+        age = time.monotonic() - entry[0] if entry else None
+
+        if entry is None or age >= self.ttl + self.max_stale:
+            self.misses += 1
+            try:
+                value = await loader()
+            except HTTPException as e:
+                if entry is None or e.status_code not in UPSTREAM_UNAVAILABLE_CODES:
+                    raise
+                logger.warning('Serving expired entry for %s, upstream unavailable: %s', key, e.detail)
+                self.stale += 1
+                return entry[1]
+            await self._store(key, value)
+            return value
+
+        self._entries.move_to_end(key)
+        if age < self.ttl:
+            self.hits += 1
+        else:
+            self.stale += 1
+            self._schedule_refresh(key, loader)
+        return entry[1]
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики попаданий, промахов и устаревших ответов."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'shared_hits': self.shared_hits,
+            'size': len(self._entries),
+        }
+
+    def clear(self) -> None:
+        """Очищает локальные записи, счётчики и отменяет фоновые обновления."""
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+        self._entries.clear()
+        self.hits = self.misses = self.stale = self.shared_hits = 0
+
+    async def _store(self, key: Hashable, value: Any) -> None:
+        self._remember(key, (time.monotonic(), value))
+        if self.backend is not None:
+            await self.backend.set(
+                cache_key(self.namespace, key),
+                pack_entry(self.dump(value)),
+                self.ttl + self.max_stale,
+            )
+
+    async def _get_shared(self, key: Hashable) -> Optional[tuple[float, Any]]:
+        """Запись из общего хранилища с временем, пересчитанным в time.monotonic()."""
+        data = await self.backend.get(cache_key(self.namespace, key))
+        if data is None:
+            return None
+        stored_at, payload = unpack_entry(data)
+        return time.monotonic() - max(0.0, time.time() - stored_at), self.load(payload)
+
+    def _remember(self, key: Hashable, entry: tuple[float, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _schedule_refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, loader))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            with background_priority():
+                value = await loader()
+        except Exception as e:
+            logger.warning('Background refresh failed for %s: %s', key, e)
+            return
+        await self._store(key, value)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Заранее сериализованное тело JSON-ответа и его ETag."""
+    content: bytes
+    etag: str
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> 'CachedResponse':
+        return cls.from_content(model.model_dump_json(by_alias=True).encode())
+
+    @classmethod
+    def from_content(cls, content: bytes) -> 'CachedResponse':
+        return cls(content=content, etag=f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Проверяет заголовок If-None-Match (список ETag, W/-префиксы или *)."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or self.etag in tags
+
+
+rates_cache = RateCache(
+    ttl=settings.RATES_CACHE_TTL_SECONDS,
+    max_size=settings.RATES_CACHE_MAX_SIZE,
+    max_stale=settings.RATES_CACHE_MAX_STALE_SECONDS,
+    backend=shared_cache,
+    namespace='rates',
+)
+
+catalogue_cache = RateCache(
+    ttl=settings.CURRENCIES_CACHE_TTL_SECONDS,
+    max_size=1,
+    max_stale=settings.CURRENCIES_CACHE_TTL_SECONDS,
+    backend=shared_cache,
+    namespace='currencies',
+    dump=attrgetter('content'),
+    load=CachedResponse.from_content,
+)
@@ -0,0 +1,20 @@
+import httpx
+
+from src.config import settings
+
+
+def create_api_client() -> httpx.AsyncClient:
+    """Создаёт общий HTTP-клиент с пулом соединений для внешнего API валют."""
+    return httpx.AsyncClient(
+        headers={'apikey': settings.CURRENCY_API_KEY},
+        http2=settings.CURRENCY_API_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.CURRENCY_API_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.CURRENCY_API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.CURRENCY_API_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.CURRENCY_API_TIMEOUT,
+            connect=settings.CURRENCY_API_CONNECT_TIMEOUT,
+        ),
+    )
@@ -0,0 +1,220 @@
+import math
+from typing import Any, Iterable, Sequence
+
+import httpx
+import numpy as np
+from fastapi import HTTPException, status
+
+from src.currency.cache import rates_cache
+from src.currency.refresher import rate_refresher
+from src.currency.utils import fetch_currency_rate
+
+
+PIVOT_CURRENCY = 'USD'
+
+
+class ConversionEngine:
+    """
+    Локальная конвертация валют по кросс-курсу через опорную валюту (USD).
+    """
+
+    def __init__(self, pivot: str = PIVOT_CURRENCY):
+        self.pivot = pivot
+        self.timestamp = 0
+        self._rates: dict[str, float] = {pivot: 1.0}
+        self._index: dict[str, int] = {pivot: 0}
+        self._vector = np.array([1.0, np.nan])
+        self._payload: dict[str, Any] | None = None
+
+    def load(self, currency_rates: dict[str, Any]) -> None:
+        """Загружает таблицу котировок вида USDxxx из ответа fetch_currency_rate."""
+        if currency_rates is self._payload:
+            return
+
+        source = currency_rates['source']
+        rates = {source: 1.0}
+        for pair, quote in currency_rates['quotes'].items():
+            if quote > 0:
+                rates[pair[len(source):]] = quote
+
+        self._rates = rates
+        self._index = {currency: i for i, currency in enumerate(rates)}
+        # Последний элемент NaN: индекс -1 неизвестной валюты даёт NaN в курсе.
+        self._vector = np.fromiter(
+            (*rates.values(), np.nan), dtype=np.float64, count=len(rates) + 1
+        )
+        self.timestamp = currency_rates['timestamp']
+        self._payload = currency_rates
+
+    @property
+    def currencies(self) -> list[str]:
+        """Валюты таблицы котировок в порядке загрузки."""
+        return list(self._rates)
+
+    def quote_row(self, from_currency: str) -> np.ndarray:
+        """Курсы from_currency ко всем валютам таблицы (в порядке currencies) одним делением."""
+        return self._vector[:-1] / self._rates[from_currency]
+
+    def quote(self, from_currency: str, to_currency: str) -> float:
+        """Курс from_currency -> to_currency, вычисленный как to/from через опорную валюту."""
+        unknown = self._unknown_currency(from_currency, to_currency)
+        if unknown is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Unknown currency: {unknown}'
+            )
+        return self._rates[to_currency] / self._rates[from_currency]
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> dict[str, Any]:
+        """
+        Конвертирует сумму и возвращает ответ в формате CurrencyConversionResponse.
+        """
+        if not math.isfinite(amount):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Amount must be a finite number'
+            )
+
+        if amount <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Amount must be greater than 0'
+            )
+
+        if not from_currency or not to_currency:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Both source and target currencies must be specified'
+            )
+
+        quote = self.quote(from_currency.upper(), to_currency.upper())
+        result = amount * quote
+        if not math.isfinite(result):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='Conversion result is out of range'
+            )
+
+        return {
+            'success': True,
+            'query': {
+                'from': from_currency,
+                'to': to_currency,
+                'amount': amount,
+            },
+            'info': {
+                'timestamp': self.timestamp,
+                'quote': quote,
+            },
+            'result': result,
+        }
+
+    def convert_batch(self, items: Iterable[tuple[float, str, str]]) -> list[dict[str, Any]]:
+        """
+        Конвертирует набор сумм (amount, from, to). Курс считается один раз на пару валют,
+        ошибки возвращаются для каждого элемента отдельно. Элементы содержат все поля
+        BatchConversionResult, поэтому их можно сериализовать без Pydantic.
+        """
+        quotes: dict[tuple[str, str], float | str] = {}
+        results = []
+        for amount, from_currency, to_currency in items:
+            query = {'from': from_currency, 'to': to_currency, 'amount': amount}
+            pair = (from_currency.upper(), to_currency.upper())
+            if pair not in quotes:
+                unknown = self._unknown_currency(*pair)
+                if unknown is not None:
+                    quotes[pair] = f'Unknown currency: {unknown}'
+                else:
+                    quotes[pair] = self._rates[pair[1]] / self._rates[pair[0]]
+            quote = quotes[pair]
+
+            if not math.isfinite(amount):
+                # NaN и inf нельзя передать в JSON, поэтому сумма в ответе заменяется на null.
+                query['amount'] = None
+                results.append({
+                    'success': False,
+                    'query': query,
+                    'info': None,
+                    'result': None,
+                    'error': 'Amount must be a finite number',
+                })
+            elif amount <= 0:
+                results.append({
+                    'success': False,
+                    'query': query,
+                    'info': None,
+                    'result': None,
+                    'error': 'Amount must be greater than 0',
+                })
+            elif isinstance(quote, str):
+                results.append({'success': False, 'query': query, 'info': None, 'result': None, 'error': quote})
+            elif not math.isfinite(amount * quote):
+                results.append({
+                    'success': False,
+                    'query': query,
+                    'info': None,
+                    'result': None,
+                    'error': 'Conversion result is out of range',
+                })
+            else:
+                results.append({
+                    'success': True,
+                    'query': query,
+                    'info': {'timestamp': self.timestamp, 'quote': quote},
+                    'result': amount * quote,
+                    'error': None,
+                })
+        return results
+
+    def convert_many(
+            self,
+            amounts: Sequence[float],
+            from_currencies: Sequence[str],
+            to_currencies: Sequence[str],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Векторная конвертация массивов сумм за один проход NumPy.
+        Возвращает курсы, результаты и маску некорректных строк (для них курс и результат NaN).
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        quotes = self._vector[self._indices(to_currencies)] / self._vector[self._indices(from_currencies)]
+        with np.errstate(over='ignore', invalid='ignore'):
+            results = amounts * quotes
+        invalid = np.isnan(quotes) | ~((amounts > 0) & np.isfinite(amounts)) | ~np.isfinite(results)
+        quotes[invalid] = np.nan
+        results[invalid] = np.nan
+        return quotes, results, invalid
+
+    def _indices(self, currencies: Sequence[str]) -> np.ndarray:
+        """Переводит коды валют в индексы таблицы; поиск в словаре только по уникальным кодам."""
+        unique, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        lookup = np.fromiter(
+            (self._index.get(currency.upper(), -1) for currency in unique.tolist()),
+            dtype=np.intp,
+            count=len(unique),
+        )
+        return lookup[inverse]
+
+    def _unknown_currency(self, from_currency: str, to_currency: str) -> str | None:
+        for currency in (from_currency, to_currency):
+            if currency not in self._rates:
+                return currency
+        return None
+
+
+conversion_engine = ConversionEngine()
+
+
+async def load_conversion_engine(client: httpx.AsyncClient) -> ConversionEngine:
+    """
+    Возвращает движок конвертации с актуальной таблицей котировок:
+    из фонового снимка курсов, а если его нет — из кэша курсов.
+    """
+    currency_rates = rate_refresher.get(conversion_engine.pivot)
+    if currency_rates is None:
+        currency_rates = await rates_cache.get(
+            (conversion_engine.pivot, ()),
+            lambda: fetch_currency_rate(conversion_engine.pivot, None, client),
+        )
+    conversion_engine.load(currency_rates)
+    return conversion_engine
@@ -0,0 +1,136 @@
+import copy
+import csv
+import io
+import math
+import tempfile
+from typing import IO, Any, AsyncIterable, AsyncIterator, Iterable, Literal
+
+import orjson
+
+from src.currency.converter import ConversionEngine
+
+
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+RATE_COLUMNS = ('from', 'to', 'quote', 'timestamp')
+CONVERSION_COLUMNS = ('amount', 'from', 'to', 'quote', 'result', 'error')
+
+
+def encode_rows(rows: Iterable[dict[str, Any]], export_format: ExportFormat, columns: tuple[str, ...]) -> bytes:
+    """Кодирует пачку строк в NDJSON (объект на строку) или CSV без заголовка."""
+    if export_format == 'ndjson':
+        return b''.join(orjson.dumps(row) + b'\n' for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_cross_rates(engine: ConversionEngine, export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Матрица кросс-курсов всех валют таблицы котировок: одна пачка строк на базовую валюту.
+    Работает с копией движка, чтобы обновление курсов во время выгрузки не смешало таблицы.
+    """
+    engine = copy.copy(engine)
+    currencies = engine.currencies
+    if export_format == 'csv':
+        yield encode_rows([dict(zip(RATE_COLUMNS, RATE_COLUMNS))], export_format, RATE_COLUMNS)
+    for base in currencies:
+        quotes = engine.quote_row(base).tolist()
+        yield encode_rows(
+            (
+                {'from': base, 'to': currency, 'quote': quote, 'timestamp': engine.timestamp}
+                for currency, quote in zip(currencies, quotes)
+            ),
+            export_format,
+            RATE_COLUMNS,
+        )
+
+
+async def spool_body(chunks: AsyncIterable[bytes], max_memory: int) -> IO[bytes]:
+    """
+    Копирует тело запроса во временный файл: в памяти до max_memory байт, дальше на диске.
+    Тело нужно прочитать до начала ответа: StreamingResponse сам слушает receive() ради disconnect.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    async for chunk in chunks:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def iter_lines(file: IO[bytes]) -> AsyncIterator[str]:
+    """
+    Построчно читает и затем закрывает файл, полученный от spool_body. Ответ к этому моменту
+    уже начат, поэтому байты не в UTF-8 заменяются символом U+FFFD, а строка станет ошибкой.
+    """
+    try:
+        for line in file:
+            yield line.decode(errors='replace').rstrip('\r\n')
+    finally:
+        file.close()
+
+
+async def stream_conversions(
+        engine: ConversionEngine,
+        lines: AsyncIterable[str],
+        export_format: ExportFormat,
+        chunk_size: int,
+) -> AsyncIterator[bytes]:
+    """
+    Конвертирует CSV-строки amount,from,to (заголовок необязателен) пачками по chunk_size.
+    Некорректные строки (в том числе с суммой nan или inf) попадают в выгрузку с текстом ошибки.
+    """
+    engine = copy.copy(engine)
+    if export_format == 'csv':
+        yield encode_rows([dict(zip(CONVERSION_COLUMNS, CONVERSION_COLUMNS))], export_format, CONVERSION_COLUMNS)
+
+    batch: list[tuple[float, str, str] | str] = []
+    async for line in lines:
+        row = next(csv.reader([line]), None)
+        if not row or row[0].strip().lower() == 'amount':
+            continue
+        try:
+            amount, from_currency, to_currency = row
+            amount = float(amount)
+            if not math.isfinite(amount):
+                raise ValueError(amount)
+            batch.append((amount, from_currency.strip(), to_currency.strip()))
+        except ValueError:
+            batch.append(f'Invalid row: {line}')
+
+        if len(batch) >= chunk_size:
+            yield _convert_chunk(engine, batch, export_format)
+            batch = []
+
+    if batch:
+        yield _convert_chunk(engine, batch, export_format)
+
+
+def _convert_chunk(
+        engine: ConversionEngine,
+        batch: list[tuple[float, str, str] | str],
+        export_format: ExportFormat,
+) -> bytes:
+    """Конвертирует пачку; строки, которые не удалось разобрать (текст ошибки), выводятся как есть."""
+    converted = iter(engine.convert_batch(item for item in batch if not isinstance(item, str)))
+    rows = []
+    for item in batch:
+        if isinstance(item, str):
+            rows.append({'amount': None, 'from': None, 'to': None, 'quote': None, 'result': None, 'error': item})
+            continue
+        result = next(converted)
+        query, info = result['query'], result['info']
+        rows.append({
+            'amount': query['amount'],
+            'from': query['from'],
+            'to': query['to'],
+            'quote': info['quote'] if info else None,
+            'result': result['result'],
+            'error': result['error'],
+        })
+    return encode_rows(rows, export_format, CONVERSION_COLUMNS)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, Optional
+
+from sqlalchemy import Insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.config import settings
+from src.currency.models import RateSnapshot
+from src.db import async_session_maker
+
+
+logger = logging.getLogger(__name__)
+
+
+def insert_ignoring_duplicates(dialect_name: str) -> Insert:
+    """INSERT в rate_snapshots, пропускающий уже записанные (source, currency, timestamp)."""
+    if dialect_name == 'postgresql':
+        return postgresql.insert(RateSnapshot).on_conflict_do_nothing()
+    return sqlite.insert(RateSnapshot).on_conflict_do_nothing()
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """
+    Ошибка вызвана самими данными (например, значение не помещается в колонку), и повтор
+    записи её не исправит. Сбои соединения и прочие ошибки считаются временными.
+    """
+    return (
+        isinstance(error, DBAPIError)
+        and not isinstance(error, (OperationalError, InterfaceError))
+        and not error.connection_invalidated
+    )
+
+
+class RateHistoryRecorder:
+    """
+    Буферизует полученные котировки и пакетно записывает их в таблицу rate_snapshots.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=max_buffer)
+        self._last_timestamp: dict[tuple[str, str], int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, currency_rates: dict[str, Any]) -> None:
+        """
+        Добавляет в буфер котировки ответа live, которые новее уже записанных для своей пары.
+        Отметка ведётся по паре (source, currency): ответ с частью валют не мешает записать
+        остальные валюты с тем же timestamp из следующего ответа.
+        """
+        source = currency_rates['source']
+        timestamp = currency_rates['timestamp']
+        prefix = len(source)
+        for pair, rate in currency_rates['quotes'].items():
+            key = (source, pair[prefix:])
+            if timestamp <= self._last_timestamp.get(key, 0):
+                continue
+            self._last_timestamp[key] = timestamp
+            self._buffer.append({'source': source, 'currency': key[1], 'timestamp': timestamp, 'rate': rate})
+
+    async def flush(self, session_maker: async_sessionmaker = async_session_maker) -> int:
+        """
+        Записывает буфер в БД пакетами по batch_size строк, каждый пакет своей транзакцией,
+        и возвращает число записанных строк. Строки забираются из буфера до записи, поэтому
+        котировки, добавленные во время записи, остаются в буфере до следующего вызова.
+
+        При временном сбое незаписанные строки возвращаются в начало буфера и ошибка
+        пробрасывается. Пакет, отклонённый из-за данных, записывается построчно: строки,
+        которые записать невозможно, отбрасываются с записью в лог и не блокируют буфер.
+        """
+        rows = list(self._buffer)
+        self._buffer.clear()
+        written = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                await self._insert(session_maker, batch)
+            except Exception as e:
+                if not is_permanent_failure(e):
+                    self._requeue(rows[start:])
+                    raise
+            else:
+                written += len(batch)
+                continue
+
+            for offset, row in enumerate(batch):
+                try:
+                    await self._insert(session_maker, [row])
+                except Exception as e:
+                    if not is_permanent_failure(e):
+                        self._requeue(rows[start + offset:])
+                        raise
+                    logger.error('Dropped rate history row %s: %s', row, e)
+                else:
+                    written += 1
+        return written
+
+    def start(self) -> None:
+        """Запускает периодическую запись буфера."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает периодическую запись и сохраняет остаток буфера."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._safe_flush()
+
+    def clear(self) -> None:
+        """Очищает буфер и отметки последних записанных котировок."""
+        self._buffer.clear()
+        self._last_timestamp.clear()
+
+    async def _insert(self, session_maker: async_sessionmaker, rows: list[dict[str, Any]]) -> None:
+        async with session_maker() as db:
+            await db.execute(insert_ignoring_duplicates(db.bind.dialect.name), rows)
+            await db.commit()
+
+    def _requeue(self, rows: list[dict[str, Any]]) -> None:
+        """Возвращает строки в начало буфера; при переполнении вытесняются самые старые."""
+        newer = list(self._buffer)
+        self._buffer.clear()
+        self._buffer.extend(rows)
+        self._buffer.extend(newer)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._safe_flush()
+
+    async def _safe_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.exception('Failed to store rate history: %s', e)
+
+
+def to_timestamp(value: datetime) -> int:
+    """Переводит дату в UNIX-время, даты без часового пояса считаются UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+async def downsample_ohlc(
+        rows: AsyncIterable[tuple[int, float]],
+        interval: int
+) -> list[dict[str, Any]]:
+    """
+    Сворачивает упорядоченные по времени точки (timestamp, rate) в свечи OHLC по интервалу.
+    """
+    candles: list[dict[str, Any]] = []
+    async for timestamp, rate in rows:
+        bucket = timestamp - timestamp % interval
+        if candles and candles[-1]['timestamp'] == bucket:
+            candle = candles[-1]
+            candle['high'] = max(candle['high'], rate)
+            candle['low'] = min(candle['low'], rate)
+            candle['close'] = rate
+            candle['count'] += 1
+        else:
+            candles.append({
+                'timestamp': bucket,
+                'open': rate,
+                'high': rate,
+                'low': rate,
+                'close': rate,
+                'count': 1,
+            })
+    return candles
+
+
+rate_history = RateHistoryRecorder(
+    batch_size=settings.RATE_HISTORY_BATCH_SIZE,
+    flush_interval=settings.RATE_HISTORY_FLUSH_INTERVAL_SECONDS,
+    max_buffer=settings.RATE_HISTORY_MAX_BUFFER,
+)
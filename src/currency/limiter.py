@@ -0,0 +1,144 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+
+
+USER_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+
+request_priority: ContextVar[int] = ContextVar('request_priority', default=USER_PRIORITY)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Помечает запросы к API в текущем контексте как фоновые (они пропускают пользовательские вперёд)."""
+    token = request_priority.set(BACKGROUND_PRIORITY)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class UpstreamScheduler:
+    """
+    Планировщик запросов к внешнему API: token bucket на rate запросов в секунду,
+    лимит одновременных запросов и приоритетная очередь с дедлайном ожидания.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, queue_timeout: float):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tokens = float(burst)
+        self._updated = 0.0
+        self._queue: list[list[Any]] = []
+        self._counter = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Занимает место для одного запроса с приоритетом из текущего контекста."""
+        await self.acquire(request_priority.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int) -> None:
+        """Ждёт своей очереди, свободного слота и токена; по дедлайну отвечает 503."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.queue_timeout
+        waiter = [priority, next(self._counter), None]
+        heapq.heappush(self._queue, waiter)
+
+        try:
+            while True:
+                delay = None
+                if self._queue[0] is waiter and self.active < self.max_concurrency:
+                    delay = self._take_token(loop.time())
+                    if delay == 0:
+                        heapq.heappop(self._queue)
+                        self.active += 1
+                        break
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail='Currency API request budget exceeded, try again later',
+                        headers={'Retry-After': '1'}
+                    )
+
+                waiter[2] = loop.create_future()
+                try:
+                    await asyncio.wait_for(waiter[2], timeout=min(delay or remaining, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                waiter[2] = None
+        except BaseException:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            self._wake_next()
+            raise
+
+        wait = loop.time() - started
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._wake_next()
+
+    def release(self) -> None:
+        """Освобождает слот и будит следующий запрос в очереди."""
+        self.active -= 1
+        self.completed += 1
+        self._wake_next()
+
+    def stats(self) -> dict[str, Any]:
+        """Метрики очереди: глубина, активные запросы, отказы и время ожидания."""
+        return {
+            'queue_depth': len(self._queue),
+            'active': self.active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'avg_wait_seconds': self.total_wait / self.completed if self.completed else 0.0,
+            'max_wait_seconds': self.max_wait,
+        }
+
+    def _take_token(self, now: float) -> float:
+        """Забирает токен и возвращает 0 или время в секундах до появления следующего токена."""
+        if self.rate <= 0:
+            return 0
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def _wake_next(self) -> None:
+        if self._queue:
+            future = self._queue[0][2]
+            if future is not None and not future.done():
+                future.set_result(None)
+
+
+upstream_scheduler = UpstreamScheduler(
+    rate=settings.CURRENCY_API_RATE_LIMIT,
+    burst=settings.CURRENCY_API_BURST,
+    max_concurrency=settings.CURRENCY_API_MAX_CONCURRENCY,
+    queue_timeout=settings.CURRENCY_API_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Float, Index, Integer, String
+
+from src.db import Base
+
+
+class RateSnapshot(Base):
+    __tablename__ = 'rate_snapshots'
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(3), nullable=False)
+    currency = Column(String(3), nullable=False)
+    timestamp = Column(Integer, nullable=False)
+    rate = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index(
+            'ix_rate_snapshots_source_currency_timestamp',
+            'source',
+            'currency',
+            'timestamp',
+            unique=True,
+        ),
+    )
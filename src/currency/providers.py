@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateProvider(ABC):
+    """
+    Источник курсов валют. Ответы приводятся к формату apilayer currency_data:
+    list -> {success, currencies}, live -> {success, timestamp, source, quotes},
+    convert -> {success, query, info, result}.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def currencies(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        """Список доступных валют."""
+
+    @abstractmethod
+    async def live(
+            self,
+            source: str,
+            currencies: Optional[str],
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        """Курсы относительно source; currencies — коды через запятую или None для всех."""
+
+    @abstractmethod
+    async def convert(
+            self,
+            amount: float,
+            from_currency: str,
+            to_currency: str,
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        """Конвертация суммы из одной валюты в другую."""
+
+
+class LocalFileProvider(RateProvider):
+    """
+    Курсы из локального JSON-файла вида {"timestamp", "source", "quotes", "currencies"}.
+    Кросс-курсы вычисляются через базовую валюту файла; файл перечитывается при изменении.
+    """
+
+    name = 'local'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._data: dict[str, Any] = {}
+        self._rates: dict[str, float] = {}
+
+    async def currencies(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        data = await self._load()
+        names = data.get('currencies') or {code: code for code in self._rates}
+        return {'success': True, 'currencies': names}
+
+    async def live(
+            self,
+            source: str,
+            currencies: Optional[str],
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        data = await self._load()
+        base = self._rate(source)
+        codes = currencies.split(',') if currencies else list(self._rates)
+        return {
+            'success': True,
+            'timestamp': data['timestamp'],
+            'source': source,
+            'quotes': {f'{source}{code}': self._rate(code) / base for code in codes},
+        }
+
+    async def convert(
+            self,
+            amount: float,
+            from_currency: str,
+            to_currency: str,
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        data = await self._load()
+        quote = self._rate(to_currency) / self._rate(from_currency)
+        return {
+            'success': True,
+            'query': {'from': from_currency, 'to': to_currency, 'amount': amount},
+            'info': {'timestamp': data['timestamp'], 'quote': quote},
+            'result': amount * quote,
+        }
+
+    async def _load(self) -> dict[str, Any]:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                data = await asyncio.to_thread(self._read)
+                source = data['source']
+                rates = {source: 1.0}
+                rates.update((pair[len(source):], quote) for pair, quote in data['quotes'].items())
+                self._data, self._rates, self._mtime = data, rates, mtime
+        except (OSError, ValueError, KeyError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f'Local rates file is unavailable: {e}'
+            )
+        return self._data
+
+    def _read(self) -> dict[str, Any]:
+        with open(self.path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _rate(self, currency: str) -> float:
+        rate = self._rates.get(currency)
+        if not rate:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Unknown currency: {currency}'
+            )
+        return rate
+
+
+class ProviderHealth:
+    """Скользящее окно длительностей и ошибок вызовов одного источника."""
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.attempted_at = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._failures: deque[bool] = deque(maxlen=window)
+
+    @property
+    def latency(self) -> float:
+        return sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self._failures) / len(self._failures) if self._failures else 0.0
+
+    def record(self, seconds: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += failed
+        self._failures.append(failed)
+        if not failed:
+            self._latencies.append(seconds)
+
+    def recover(self) -> None:
+        """Забывает прошлые ошибки после успешного пробного вызова."""
+        self._failures.clear()
+
+
+class ProviderRouter:
+    """
+    Выбирает самый быстрый исправный источник курсов по скользящей средней длительности.
+    Источники с долей ошибок выше max_error_rate пробуются последними; при ошибке
+    источника (5xx, 429 или сбой соединения) запрос повторяется у следующего.
+
+    Пониженный источник раз в probe_interval секунд получает пробный запрос первым
+    (при его сбое запрос уходит дальше по списку); успех пробы обнуляет окно ошибок,
+    и источник снова ранжируется по длительности.
+    """
+
+    def __init__(
+            self,
+            providers: list[RateProvider],
+            window: int,
+            max_error_rate: float,
+            probe_interval: float = 30.0,
+    ):
+        self.providers = providers
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self._health = {provider.name: ProviderHealth(window) for provider in providers}
+
+    def ranked(self) -> list[RateProvider]:
+        """
+        Источники в порядке выбора: пониженные, которым пора пройти пробу, затем исправные
+        по возрастанию длительности, затем остальные.
+        """
+        now = time.monotonic()
+
+        def score(item: tuple[int, RateProvider]) -> tuple[int, float, int]:
+            index, provider = item
+            health = self._health[provider.name]
+            if not self._demoted(health):
+                return 1, health.latency, index
+            if now - health.attempted_at >= self.probe_interval:
+                return 0, 0.0, index
+            return 2, health.latency, index
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=score)]
+
+    async def call(self, operation: Callable[[RateProvider], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+        """Выполняет операцию у лучшего источника, переходя к следующему при его сбое."""
+        error: Optional[Exception] = None
+        for provider in self.ranked():
+            health = self._health[provider.name]
+            probing = self._demoted(health)
+            started = health.attempted_at = time.monotonic()
+            try:
+                result = await operation(provider)
+            except HTTPException as e:
+                if e.status_code < 500 and e.status_code != status.HTTP_429_TOO_MANY_REQUESTS:
+                    health.record(time.monotonic() - started, failed=False)
+                    raise
+                error = e
+            except (httpx.HTTPError, ValueError) as e:
+                error = e
+            else:
+                health.record(time.monotonic() - started, failed=False)
+                if probing:
+                    health.recover()
+                    logger.info('Rate provider %s recovered', provider.name)
+                return result
+            health.record(time.monotonic() - started, failed=True)
+            logger.warning('Rate provider %s failed: %s', provider.name, error)
+
+        if isinstance(error, HTTPException):
+            raise error
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f'All rate providers failed: {error}'
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            name: {
+                'calls': health.calls,
+                'errors': health.errors,
+                'error_rate': health.error_rate,
+                'avg_latency_seconds': health.latency,
+                'healthy': not self._demoted(health),
+            }
+            for name, health in self._health.items()
+        }
+
+    def _demoted(self, health: ProviderHealth) -> bool:
+        return health.error_rate > self.max_error_rate
+
+    def reset(self) -> None:
+        self._health = {provider.name: ProviderHealth(self.window) for provider in self.providers}
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
+
+import httpx
+
+from src.config import settings
+from src.currency.limiter import background_priority
+from src.currency.utils import fetch_currency_rate
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuoteSnapshot:
+    """Неизменяемый снимок курсов по базовым валютам с версией и временем обновления."""
+    version: int = 0
+    updated_at: float = 0.0
+    rates: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+class RateRefresher:
+    """
+    Фоновая задача, по расписанию загружающая полные таблицы курсов для набора базовых валют.
+    Обработчики запросов читают готовый снимок и не обращаются к внешнему API.
+    """
+
+    def __init__(self, sources: list[str], interval: float, max_age: float):
+        self.sources = sources
+        self.interval = interval
+        self.max_age = max_age
+        self.snapshot = QuoteSnapshot()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, client: httpx.AsyncClient) -> None:
+        """Запускает фоновое обновление курсов."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self) -> None:
+        """Останавливает фоновое обновление курсов."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        """
+        Загружает курсы для всех базовых валют и публикует новый снимок.
+        Время обновления сдвигается при каждой успешной загрузке, версия — только при изменении курсов.
+        """
+        results = await asyncio.gather(
+            *(fetch_currency_rate(source, None, client) for source in self.sources),
+            return_exceptions=True,
+        )
+        rates = dict(self.snapshot.rates)
+        loaded = False
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                logger.warning('Failed to refresh %s rates: %s', source, result)
+            else:
+                rates[source] = result
+                loaded = True
+
+        if not loaded:
+            return
+        if rates != self.snapshot.rates:
+            self.snapshot = QuoteSnapshot(
+                version=self.snapshot.version + 1,
+                updated_at=time.time(),
+                rates=rates,
+            )
+        else:
+            self.snapshot = replace(self.snapshot, updated_at=time.time())
+
+    def get(self, source: str) -> Optional[dict[str, Any]]:
+        """Курсы для базовой валюты из снимка или None, если их нет или снимок устарел."""
+        snapshot = self.snapshot
+        if time.time() - snapshot.updated_at > self.max_age:
+            return None
+        return snapshot.rates.get(source)
+
+    def stats(self) -> dict[str, Any]:
+        """Состояние снимка курсов."""
+        return {
+            'running': self.running,
+            'version': self.snapshot.version,
+            'updated_at': self.snapshot.updated_at,
+            'sources': sorted(self.snapshot.rates),
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает снимок курсов."""
+        self.snapshot = QuoteSnapshot()
+
+    async def _run(self, client: httpx.AsyncClient) -> None:
+        with background_priority():
+            while True:
+                try:
+                    await self.refresh(client)
+                except Exception as e:
+                    logger.exception('Rate refresh failed: %s', e)
+                await asyncio.sleep(self.interval)
+
+
+def select_quotes(currency_rates: dict[str, Any], currencies: tuple[str, ...]) -> Optional[dict[str, Any]]:
+    """
+    Оставляет в полной таблице курсов только запрошенные валюты.
+    Возвращает None, если какой-то валюты в таблице нет.
+    """
+    if not currencies:
+        return currency_rates
+
+    source = currency_rates['source']
+    quotes = currency_rates['quotes']
+    pairs = [f'{source}{currency}' for currency in currencies]
+    if any(pair not in quotes for pair in pairs):
+        return None
+    return {**currency_rates, 'quotes': {pair: quotes[pair] for pair in pairs}}
+
+
+rate_refresher = RateRefresher(
+    sources=settings.RATES_REFRESH_SOURCES,
+    interval=settings.RATES_REFRESH_INTERVAL_SECONDS,
+    max_age=settings.RATES_SNAPSHOT_MAX_AGE_SECONDS,
+)
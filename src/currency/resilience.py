@@ -0,0 +1,171 @@
+import random
+import time
+from collections import deque
+from typing import Any, Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from src.config import settings
+
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Ошибка говорит о проблемах внешнего API: сетевая ошибка, ответ 5xx или 429 (перегрузка)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        code = error.response.status_code
+        return code >= 500 or code == status.HTTP_429_TOO_MANY_REQUESTS
+    return isinstance(error, httpx.RequestError)
+
+
+class RetryPolicy:
+    """
+    Повтор идемпотентных GET-запросов с экспоненциальной задержкой и полным jitter.
+    """
+
+    def __init__(self, retries: int, backoff: float, max_backoff: float):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retried = 0
+
+    def should_retry(self, attempt: int, error: Exception) -> bool:
+        """Можно ли повторить запрос после неудачной попытки с номером attempt (с нуля)."""
+        if attempt >= self.retries:
+            return False
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, httpx.RequestError)
+
+    def delay(self, attempt: int) -> float:
+        """Случайная задержка от 0 до backoff * 2^attempt, но не больше max_backoff."""
+        self.retried += 1
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def stats(self) -> dict[str, int]:
+        return {'retried': self.retried}
+
+    def reset(self) -> None:
+        self.retried = 0
+
+
+class LatencyTracker:
+    """
+    Скользящее окно длительностей успешных запросов к API для выбора задержки hedged-запроса.
+    """
+
+    def __init__(self, window: int, min_samples: int):
+        self.min_samples = min_samples
+        self.hedged = 0
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Перцентиль длительности или None, пока замеров меньше min_samples."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'samples': len(self._samples),
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'hedged': self.hedged,
+        }
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self.hedged = 0
+
+
+class CircuitBreaker:
+    """
+    Автомат closed -> open -> half-open для внешнего API.
+
+    После failure_threshold ошибок подряд запросы сразу получают 503, пока не пройдёт
+    reset_timeout; затем пропускается один пробный запрос, успех которого закрывает автомат.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def check(self) -> None:
+        """Пропускает запрос или отвечает 503, пока автомат разомкнут."""
+        state = self.state
+        if state == 'closed':
+            return
+        if state == 'half-open' and not self._probing:
+            self._probing = True
+            return
+
+        self.rejected += 1
+        retry_after = self.reset_timeout - (time.monotonic() - self._opened_at)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='External currency API is unavailable, try again later',
+            headers={'Retry-After': str(max(1, int(retry_after + 0.5)))}
+        )
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self._opened_at is None and self.failures >= self.failure_threshold):
+            self.opened += 1
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Освобождает пробный запрос, завершившийся без ответа API (например, отказом планировщика)."""
+        self._probing = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
+
+    def reset(self) -> None:
+        self.failures = self.opened = self.rejected = 0
+        self._opened_at = None
+        self._probing = False
+
+
+retry_policy = RetryPolicy(
+    retries=settings.CURRENCY_API_RETRIES,
+    backoff=settings.CURRENCY_API_RETRY_BACKOFF,
+    max_backoff=settings.CURRENCY_API_RETRY_MAX_BACKOFF,
+)
+
+upstream_latency = LatencyTracker(window=200, min_samples=20)
+
+upstream_breaker = CircuitBreaker(
+    failure_threshold=settings.CURRENCY_API_BREAKER_THRESHOLD,
+    reset_timeout=settings.CURRENCY_API_BREAKER_RESET_SECONDS,
+)
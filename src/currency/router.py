@@ -1,11 +1,45 @@
-from typing import Annotated, List, Optional
+import asyncio
+from datetime import datetime, timezone
+from typing import Annotated, Any, List, Optional, Union
 
-from fastapi import APIRouter, Query, Depends, status, HTTPException
+import httpx
+import numpy as np
+import orjson
+from fastapi import APIRouter, Query, Depends, Request, Response, status, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.models import User
 from src.config import settings
-from src.currency.utils import fetch_currencies, fetch_currency_rate, convert_currency
-from src.currency.schemas import CurrencyRate, CurrencyConversionResponse, CurrenciesResponse
+from src.db_depends import get_session
+from src.currency.cache import CachedResponse, catalogue_cache, rates_cache
+from src.currency.converter import load_conversion_engine
+from src.currency.export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    iter_lines,
+    spool_body,
+    stream_conversions,
+    stream_cross_rates,
+)
+from src.currency.history import downsample_ohlc, to_timestamp
+from src.currency.models import RateSnapshot
+from src.currency.refresher import rate_refresher, select_quotes
+from src.currency.stream import rate_broadcaster, sse_events
+from src.currency.utils import fetch_currencies, fetch_currency_rate
+from src.currency.schemas import (
+    CurrencyRate,
+    MultiCurrencyRate,
+    CurrencyConversionResponse,
+    CurrenciesResponse,
+    BatchConversionRequest,
+    BatchConversionResponse,
+    ColumnarConversionRequest,
+    ColumnarConversionResponse,
+    RateHistoryResponse,
+)
 from src.auth.security import get_current_user
 
 
@@ -21,52 +55,119 @@ COMMON_RESPONSES = {
 currencies_router = APIRouter(prefix='/currencies', tags=['currencies'])
 
 
-def get_api_client() -> dict:
-    """Зависимость для конфигурации клиента API"""
-    return {
-        'headers': {
-            'apikey': settings.CURRENCY_API_KEY
-        }
-    }
+def get_api_client(request: Request) -> httpx.AsyncClient:
+    """Зависимость, возвращающая общий клиент внешнего API, созданный в lifespan."""
+    return request.app.state.api_client
+
+
+async def load_catalogue(api_client: httpx.AsyncClient) -> CachedResponse:
+    """Загружает список валют и заранее сериализует ответ."""
+    currencies = await fetch_currencies(api_client)
+    return CachedResponse.from_model(CurrenciesResponse(**currencies))
 
 
-@currencies_router.get('', response_model=CurrenciesResponse, responses=COMMON_RESPONSES)
+@currencies_router.get(
+    '',
+    response_model=CurrenciesResponse,
+    responses={**COMMON_RESPONSES, 304: {'description': 'Not Modified'}}
+)
 async def get_currencies(
         current_user: Annotated[User, Depends(get_current_user)],
-        api_client: dict = Depends(get_api_client),
-)-> CurrenciesResponse:
-    """Получить список доступных валют."""
+        request: Request,
+        api_client: httpx.AsyncClient = Depends(get_api_client),
+)-> Response:
+    """Получить список доступных валют (поддерживаются ETag и If-None-Match)."""
 
-    headers = api_client.get('headers', {})
-    if not headers:
+    if not api_client.headers.get('apikey'):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail='Client API headers not configured'
         )
 
-    currencies = await fetch_currencies(headers)
-    return CurrenciesResponse(**currencies)
+    catalogue = await catalogue_cache.get('currencies', lambda: load_catalogue(api_client))
+    headers = {
+        'ETag': catalogue.etag,
+        'Cache-Control': f'private, max-age={int(settings.CURRENCIES_CACHE_TTL_SECONDS)}',
+    }
+    if catalogue.matches(request.headers.get('if-none-match')):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=catalogue.content, media_type='application/json', headers=headers)
+
+
+def rate_payload(courses: dict[str, Any]) -> dict[str, Any]:
+    """Поля CurrencyRate из ответа источника курсов для быстрой сериализации без Pydantic."""
+    return {field: courses[field] for field in CurrencyRate.model_fields}
+
+
+async def resolve_rates(
+        source: str,
+        currencies_key: tuple[str, ...],
+        api_client: httpx.AsyncClient
+) -> dict[str, Any]:
+    """Курсы для базовой валюты: из фонового снимка, а если их там нет — из кэша курсов."""
+    snapshot_rates = rate_refresher.get(source)
+    courses = select_quotes(snapshot_rates, currencies_key) if snapshot_rates else None
+    if courses is None:
+        currencies_str = ','.join(currencies_key) or None
+        courses = await rates_cache.get(
+            (source, currencies_key),
+            lambda: fetch_currency_rate(source, currencies_str, api_client),
+        )
+    return courses
 
 
-@currencies_router.get('/rates', response_model=CurrencyRate, responses=COMMON_RESPONSES)
+@currencies_router.get(
+    '/rates',
+    response_model=Union[CurrencyRate, MultiCurrencyRate],
+    responses=COMMON_RESPONSES
+)
 async def get_currency_rate(
     current_user: Annotated[User, Depends(get_current_user)],
-    source: str = Query(default='USD', description='Базовая валюта'),
+    source: List[str] = Query(default=['USD'], description='Базовая валюта (можно указать несколько)'),
     currencies: Optional[List[str]] = Query(default=None, description='Валюты, например: EUR, GBP, JPY'),
-    api_client: dict = Depends(get_api_client),
-) -> CurrencyRate:
-    """Получить курсы валют относительно базовой валюты."""
+    api_client: httpx.AsyncClient = Depends(get_api_client),
+) -> Union[CurrencyRate, MultiCurrencyRate, Response]:
+    """
+    Получить курсы валют относительно базовой валюты.
+    Для нескольких базовых валют курсы загружаются параллельно и возвращаются одним ответом.
+    """
 
-    headers = api_client.get('headers', {})
-    if not headers:
+    if not api_client.headers.get('apikey'):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail='Client API headers not configured'
         )
 
-    currencies_str = ','.join(currencies) if currencies else None
-    courses = await fetch_currency_rate(source, currencies_str, headers)
-    return CurrencyRate(**courses)
+    sources = list(dict.fromkeys(source))
+    if len(sources) > settings.RATES_MAX_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'No more than {settings.RATES_MAX_SOURCES} sources are allowed'
+        )
+
+    currencies_key = tuple(sorted(set(currencies))) if currencies else ()
+    if len(sources) == 1:
+        courses = await resolve_rates(sources[0], currencies_key, api_client)
+        if settings.FAST_JSON_RESPONSES:
+            return ORJSONResponse(rate_payload(courses))
+        return CurrencyRate(**courses)
+
+    semaphore = asyncio.Semaphore(settings.RATES_FANOUT_CONCURRENCY)
+
+    async def resolve_bounded(base: str) -> dict[str, Any]:
+        async with semaphore:
+            return await resolve_rates(base, currencies_key, api_client)
+
+    results = await asyncio.gather(*(resolve_bounded(base) for base in sources))
+    if settings.FAST_JSON_RESPONSES:
+        return ORJSONResponse({
+            'success': True,
+            'rates': {base: rate_payload(courses) for base, courses in zip(sources, results)},
+        })
+    return MultiCurrencyRate(
+        success=True,
+        rates={base: CurrencyRate(**courses) for base, courses in zip(sources, results)},
+    )
 
 
 @currencies_router.get(
@@ -79,16 +180,233 @@ async def get_converted_currency(
     amount: float = Query(description='Количество'),
     from_currency: str = Query(description='Из'),
     to_currency: str = Query(description='В'),
-    api_client: dict = Depends(get_api_client)
-) -> CurrencyConversionResponse:
+    api_client: httpx.AsyncClient = Depends(get_api_client)
+) -> Union[CurrencyConversionResponse, Response]:
     """Конвертировать сумму из одной валюты в другую."""
 
-    headers = api_client.get('headers', {})
-    if not headers:
+    if not api_client.headers.get('apikey'):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail='Client API headers not configured'
         )
 
-    exchange_result = await convert_currency(amount, from_currency, to_currency, headers)
+    engine = await load_conversion_engine(api_client)
+    exchange_result = engine.convert(amount, from_currency, to_currency)
+    if settings.FAST_JSON_RESPONSES:
+        return ORJSONResponse(exchange_result)
     return CurrencyConversionResponse(**exchange_result)
+
+
+@currencies_router.post(
+    '/convert/batch',
+    response_model=BatchConversionResponse,
+    responses=COMMON_RESPONSES
+)
+async def get_converted_currency_batch(
+    current_user: Annotated[User, Depends(get_current_user)],
+    body: BatchConversionRequest,
+    api_client: httpx.AsyncClient = Depends(get_api_client)
+) -> Union[BatchConversionResponse, Response]:
+    """Конвертировать список сумм за один запрос (ошибки возвращаются для каждого элемента)."""
+
+    if not api_client.headers.get('apikey'):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='Client API headers not configured'
+        )
+
+    engine = await load_conversion_engine(api_client)
+    results = engine.convert_batch((item.amount, item.from_, item.to) for item in body.items)
+    if settings.FAST_JSON_RESPONSES:
+        return ORJSONResponse({'results': results})
+    return BatchConversionResponse(results=results)
+
+
+@currencies_router.post(
+    '/convert/columnar',
+    response_model=ColumnarConversionResponse,
+    responses=COMMON_RESPONSES
+)
+async def get_converted_currency_columnar(
+    current_user: Annotated[User, Depends(get_current_user)],
+    body: ColumnarConversionRequest,
+    api_client: httpx.AsyncClient = Depends(get_api_client)
+) -> Union[ColumnarConversionResponse, Response]:
+    """
+    Конвертировать большие массивы сумм векторно. Данные передаются параллельными массивами,
+    для некорректных строк курс и результат равны null, их индексы перечислены в invalid.
+    """
+
+    if not api_client.headers.get('apikey'):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='Client API headers not configured'
+        )
+
+    if len(body.amount) > settings.CONVERT_COLUMNAR_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'Batch size must not exceed {settings.CONVERT_COLUMNAR_MAX_ITEMS} items'
+        )
+
+    engine = await load_conversion_engine(api_client)
+    quotes, results, invalid = engine.convert_many(body.amount, body.from_, body.to)
+    if settings.FAST_JSON_RESPONSES:
+        # orjson сериализует массивы NumPy напрямую, NaN некорректных строк становится null.
+        return ORJSONResponse({
+            'success': True,
+            'timestamp': engine.timestamp,
+            'quote': quotes,
+            'result': results,
+            'invalid': np.flatnonzero(invalid),
+        })
+    quote_list, result_list = quotes.tolist(), results.tolist()
+    invalid_rows = np.flatnonzero(invalid).tolist()
+    for row in invalid_rows:
+        quote_list[row] = result_list[row] = None
+
+    return ColumnarConversionResponse(
+        success=True,
+        timestamp=engine.timestamp,
+        quote=quote_list,
+        result=result_list,
+        invalid=invalid_rows,
+    )
+
+
+@currencies_router.get(
+    '/export/rates',
+    response_class=StreamingResponse,
+    responses={**COMMON_RESPONSES, 200: {'content': {media: {} for media in MEDIA_TYPES.values()}}}
+)
+async def export_cross_rates(
+    current_user: Annotated[User, Depends(get_current_user)],
+    format: ExportFormat = Query(default='ndjson', description='Формат выгрузки: ndjson или csv'),
+    api_client: httpx.AsyncClient = Depends(get_api_client)
+) -> StreamingResponse:
+    """Выгрузить матрицу кросс-курсов всех валют потоком, по строке на пару валют."""
+
+    if not api_client.headers.get('apikey'):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='Client API headers not configured'
+        )
+
+    engine = await load_conversion_engine(api_client)
+    return StreamingResponse(
+        stream_cross_rates(engine, format),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="rates.{format}"'},
+    )
+
+
+@currencies_router.post(
+    '/export/convert',
+    response_class=StreamingResponse,
+    responses={**COMMON_RESPONSES, 200: {'content': {media: {} for media in MEDIA_TYPES.values()}}},
+    openapi_extra={'requestBody': {'content': {'text/csv': {'schema': {'type': 'string'}}}, 'required': True}},
+)
+async def export_conversions(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    format: ExportFormat = Query(default='ndjson', description='Формат выгрузки: ndjson или csv'),
+    api_client: httpx.AsyncClient = Depends(get_api_client)
+) -> StreamingResponse:
+    """
+    Конвертировать CSV-файл со строками amount,from,to, переданный телом запроса.
+    Файл буферизуется во временный файл, результат отдаётся потоком пачками по CONVERT_STREAM_CHUNK_SIZE строк.
+    """
+
+    if not api_client.headers.get('apikey'):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='Client API headers not configured'
+        )
+
+    engine = await load_conversion_engine(api_client)
+    body = await spool_body(request.stream(), settings.CONVERT_STREAM_SPOOL_BYTES)
+    return StreamingResponse(
+        stream_conversions(
+            engine,
+            iter_lines(body),
+            format,
+            settings.CONVERT_STREAM_CHUNK_SIZE,
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="conversions.{format}"'},
+    )
+
+
+@currencies_router.get(
+    '/stream',
+    response_class=StreamingResponse,
+    responses={**COMMON_RESPONSES, 200: {'content': {'text/event-stream': {}}}}
+)
+async def stream_currency_rates(
+    current_user: Annotated[User, Depends(get_current_user)],
+    source: str = Query(default='USD', description='Базовая валюта'),
+    currencies: Optional[List[str]] = Query(default=None, description='Валюты, например: EUR, GBP, JPY'),
+    api_client: httpx.AsyncClient = Depends(get_api_client),
+) -> StreamingResponse:
+    """
+    Подписаться на изменения курсов (Server-Sent Events). Авторизация проверяется один раз
+    при подключении, дальше приходят только изменившиеся курсы выбранных валют.
+    Базовая валюта должна быть в списке валют: на каждую базовую валюту опрашивается внешний API.
+    """
+
+    if not api_client.headers.get('apikey'):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail='Client API headers not configured'
+        )
+
+    source = source.upper()
+    currencies = [currency.upper() for currency in currencies] if currencies else None
+    if source not in settings.RATES_REFRESH_SOURCES:
+        catalogue = await catalogue_cache.get('currencies', lambda: load_catalogue(api_client))
+        if source not in orjson.loads(catalogue.content)['currencies']:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f'Unknown source currency: {source}'
+            )
+
+    rate_broadcaster.ensure_capacity()
+    return StreamingResponse(
+        sse_events(source, currencies, api_client, settings.RATES_STREAM_KEEPALIVE_SECONDS),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@currencies_router.get('/history', response_model=RateHistoryResponse, responses=COMMON_RESPONSES)
+async def get_rate_history(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_session)],
+    currency: str = Query(description='Валюта котировки, например: EUR'),
+    source: str = Query(default='USD', description='Базовая валюта'),
+    start: datetime = Query(description='Начало периода'),
+    end: Optional[datetime] = Query(default=None, description='Конец периода (по умолчанию сейчас)'),
+    interval: int = Query(default=3600, ge=60, description='Интервал свечи в секундах'),
+) -> RateHistoryResponse:
+    """Получить историю курса из сохранённых котировок в виде свечей OHLC."""
+
+    source, currency = source.upper(), currency.upper()
+    start_ts = to_timestamp(start)
+    end_ts = to_timestamp(end or datetime.now(timezone.utc))
+    if start_ts > end_ts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Start must not be later than end'
+        )
+
+    rows = await db.stream(
+        select(RateSnapshot.timestamp, RateSnapshot.rate)
+        .where(
+            RateSnapshot.source == source,
+            RateSnapshot.currency == currency,
+            RateSnapshot.timestamp.between(start_ts, end_ts),
+        )
+        .order_by(RateSnapshot.timestamp)
+    )
+    candles = await downsample_ohlc(rows.tuples(), interval)
+    return RateHistoryResponse(source=source, currency=currency, interval=interval, candles=candles)
@@ -1,6 +1,8 @@
-from typing import Dict
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from src.config import settings
 
 
 class CurrenciesResponse(BaseModel):
@@ -29,6 +31,11 @@ class CurrencyRate(BaseModel):
     )
 
 
+class MultiCurrencyRate(BaseModel):
+    success: bool
+    rates: Dict[str, CurrencyRate]
+
+
 class QueryModel(BaseModel):
     from_: str = Field(default='USD', alias='from')
     to: str
@@ -65,3 +72,113 @@ class CurrencyConversionResponse(BaseModel):
             }
         }
     )
+
+
+class BatchConversionRequest(BaseModel):
+    items: List[QueryModel] = Field(min_length=1, max_length=settings.CONVERT_BATCH_MAX_ITEMS)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [
+                    {"from": "USD", "to": "EUR", "amount": 2},
+                    {"from": "EUR", "to": "RUB", "amount": 10}
+                ]
+            }
+        }
+    )
+
+
+class BatchQueryModel(QueryModel):
+    amount: Optional[float] = None
+
+
+class BatchConversionResult(BaseModel):
+    success: bool
+    query: BatchQueryModel
+    info: Optional[InfoModel] = None
+    result: Optional[float] = None
+    error: Optional[str] = None
+
+
+class BatchConversionResponse(BaseModel):
+    results: List[BatchConversionResult]
+
+
+class ColumnarConversionRequest(BaseModel):
+    amount: List[float]
+    from_: List[str] = Field(alias='from')
+    to: List[str]
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={
+            "example": {
+                "amount": [2, 10],
+                "from": ["USD", "EUR"],
+                "to": ["EUR", "RUB"]
+            }
+        }
+    )
+
+    @model_validator(mode='after')
+    def check_lengths(self) -> 'ColumnarConversionRequest':
+        if not len(self.amount) == len(self.from_) == len(self.to):
+            raise ValueError('amount, from and to must have the same length')
+        return self
+
+
+class ColumnarConversionResponse(BaseModel):
+    success: bool
+    timestamp: int
+    quote: List[Optional[float]]
+    result: List[Optional[float]]
+    invalid: List[int]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "success": True,
+                "timestamp": 1747256405,
+                "quote": [0.89499, 89.80335],
+                "result": [1.78998, 898.0335],
+                "invalid": []
+            }
+        }
+    )
+
+
+class OHLCModel(BaseModel):
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    count: int
+
+
+class RateHistoryResponse(BaseModel):
+    source: str
+    currency: str
+    interval: int
+    candles: List[OHLCModel]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "source": "USD",
+                "currency": "EUR",
+                "interval": 3600,
+                "candles": [
+                    {
+                        "timestamp": 1747252800,
+                        "open": 0.89499,
+                        "high": 0.89612,
+                        "low": 0.89411,
+                        "close": 0.89507,
+                        "count": 60
+                    }
+                ]
+            }
+        }
+    )
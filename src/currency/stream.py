@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+import orjson
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.currency.cache import rates_cache
+from src.currency.limiter import background_priority
+from src.currency.refresher import rate_refresher
+from src.currency.utils import fetch_currency_rate
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Подписка одного клиента на курсы базовой валюты.
+
+    Обновления не копятся в очереди, а сливаются в словарь последних значений по парам:
+    медленный клиент получает только актуальные курсы, а память ограничена числом пар.
+    """
+
+    def __init__(self, source: str, pairs: Optional[frozenset[str]]):
+        self.source = source
+        self.pairs = pairs
+        self.timestamp = 0
+        self.conflated = 0
+        self._pending: dict[str, float] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, timestamp: int, quotes: dict[str, float]) -> None:
+        """Добавляет изменившиеся курсы, оставляя только пары подписки."""
+        if self.pairs is not None:
+            quotes = {pair: rate for pair, rate in quotes.items() if pair in self.pairs}
+        if not quotes:
+            return
+        if self._pending:
+            self.conflated += 1
+        self._pending.update(quotes)
+        self.timestamp = timestamp
+        self._ready.set()
+
+    async def next(self) -> dict[str, Any]:
+        """Ждёт и забирает накопленные изменения."""
+        await self._ready.wait()
+        self._ready.clear()
+        quotes, self._pending = self._pending, {}
+        return {'source': self.source, 'timestamp': self.timestamp, 'quotes': quotes}
+
+
+class RateBroadcaster:
+    """
+    Раздаёт изменения курсов подписчикам. На каждую базовую валюту работает один опрос
+    (из фонового снимка или кэша курсов), пока у неё есть подписчики.
+    """
+
+    def __init__(self, interval: float, max_subscribers: int):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._last: dict[str, dict[str, Any]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def ensure_capacity(self) -> None:
+        """Отвечает 503, если достигнут лимит подписчиков."""
+        if self.subscriber_count >= self.max_subscribers:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Too many rate stream subscribers, try again later',
+                headers={'Retry-After': '5'}
+            )
+
+    def subscribe(
+            self,
+            source: str,
+            currencies: Optional[list[str]],
+            client: httpx.AsyncClient
+    ) -> Subscription:
+        """Регистрирует подписчика; последние известные курсы отправляются ему сразу."""
+        pairs = frozenset(f'{source}{currency}' for currency in currencies) if currencies else None
+        subscription = Subscription(source, pairs)
+        self._subscribers.setdefault(source, set()).add(subscription)
+
+        last = self._last.get(source)
+        if last is not None:
+            subscription.offer(last['timestamp'], last['quotes'])
+        if source not in self._pollers:
+            self._pollers[source] = asyncio.create_task(self._poll(source, client))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Удаляет подписчика и останавливает опрос валюты, если подписчиков не осталось."""
+        subscribers = self._subscribers.get(subscription.source)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.source]
+            poller = self._pollers.pop(subscription.source, None)
+            if poller is not None:
+                poller.cancel()
+
+    def publish(self, currency_rates: dict[str, Any]) -> None:
+        """Отправляет подписчикам только курсы, изменившиеся с прошлой публикации."""
+        source = currency_rates['source']
+        previous = self._last.get(source, {}).get('quotes', {})
+        changed = {
+            pair: rate for pair, rate in currency_rates['quotes'].items() if previous.get(pair) != rate
+        }
+        self._last[source] = currency_rates
+        if not changed:
+            return
+        self.published += 1
+        for subscription in self._subscribers.get(source, ()):
+            subscription.offer(currency_rates['timestamp'], changed)
+
+    async def stop(self) -> None:
+        """Останавливает все опросы."""
+        pollers = list(self._pollers.values())
+        self._pollers.clear()
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'subscribers': self.subscriber_count,
+            'sources': sorted(self._pollers),
+            'published': self.published,
+            'conflated': sum(
+                subscription.conflated
+                for subscribers in self._subscribers.values()
+                for subscription in subscribers
+            ),
+        }
+
+    def reset(self) -> None:
+        for poller in self._pollers.values():
+            poller.cancel()
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._last.clear()
+        self.published = 0
+
+    async def _poll(self, source: str, client: httpx.AsyncClient) -> None:
+        with background_priority():
+            while True:
+                try:
+                    self.publish(await self._load(source, client))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning('Rate stream poll failed for %s: %s', source, e)
+                await asyncio.sleep(self.interval)
+
+    async def _load(self, source: str, client: httpx.AsyncClient) -> dict[str, Any]:
+        currency_rates = rate_refresher.get(source)
+        if currency_rates is None:
+            currency_rates = await rates_cache.get(
+                (source, ()),
+                lambda: fetch_currency_rate(source, None, client),
+            )
+        return currency_rates
+
+
+async def sse_events(
+        source: str,
+        currencies: Optional[list[str]],
+        client: httpx.AsyncClient,
+        keepalive: float
+) -> AsyncIterator[bytes]:
+    """
+    События Server-Sent Events с изменениями курсов; при простое шлёт комментарий keepalive.
+    Подписка оформляется при старте генератора и снимается, когда клиент отключается.
+    """
+    subscription = rate_broadcaster.subscribe(source, currencies, client)
+    try:
+        while True:
+            try:
+                update = await asyncio.wait_for(subscription.next(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+            yield b'event: rates\ndata: ' + orjson.dumps(update) + b'\n\n'
+    finally:
+        rate_broadcaster.unsubscribe(subscription)
+
+
+rate_broadcaster = RateBroadcaster(
+    interval=settings.RATES_STREAM_INTERVAL_SECONDS,
+    max_subscribers=settings.RATES_STREAM_MAX_SUBSCRIBERS,
+)
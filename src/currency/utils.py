@@ -1,50 +1,232 @@
+import asyncio
+import time
 from typing import Any, Optional
 
 import httpx
 from fastapi import HTTPException, status
 
 from src.config import settings
+from src.currency.history import rate_history
+from src.currency.limiter import upstream_scheduler
+from src.currency.providers import LocalFileProvider, ProviderRouter, RateProvider
+from src.currency.resilience import (
+    is_upstream_failure,
+    retry_policy,
+    upstream_breaker,
+    upstream_latency,
+)
+
+
+_in_flight: dict[tuple, asyncio.Task] = {}
+
+
+def _request_key(api_url: str, client: httpx.AsyncClient, params: Optional[dict]) -> tuple:
+    """Ключ запроса: клиент, URL и отсортированные непустые параметры."""
+    normalized = tuple(sorted(
+        (name, str(value)) for name, value in (params or {}).items() if value is not None
+    ))
+    return id(client), api_url, normalized
 
 
 async def send_request(
         api_url: str,
-        headers: dict,
+        client: httpx.AsyncClient,
+        params: Optional[dict] = None
+) -> dict[str, Any]:
+    """
+    Асинхронно отправляет GET-запрос к внешнему API валют через общий клиент.
+    Одновременные одинаковые запросы объединяются в один запрос к API (single-flight).
+    """
+    key = _request_key(api_url, client, params)
+    task = _in_flight.get(key)
+    if task is None or task.done():
+        task = asyncio.create_task(_send_request(api_url, client, params))
+        _in_flight[key] = task
+        task.add_done_callback(lambda done: _forget_request(key, done))
+    return await asyncio.shield(task)
+
+
+def _forget_request(key: tuple, task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    if not task.cancelled():
+        task.exception()
+
+
+async def _send_request(
+        api_url: str,
+        client: httpx.AsyncClient,
         params: Optional[dict] = None
 ) -> dict[str, Any]:
-    """Асинхронно отправляет GET-запрос к внешнему API валют."""
+    """
+    Выполняет запрос через автомат отключения: повторяет сетевые ошибки и ответы 5xx/429
+    с экспоненциальной задержкой, пока автомат не разомкнётся или не кончатся попытки.
+    """
+    upstream_breaker.check()
+    attempt = 0
+    while True:
+        try:
+            response = await _get_hedged(api_url, client, params)
+        except (httpx.HTTPStatusError, httpx.RequestError) as e:
+            if is_upstream_failure(e):
+                upstream_breaker.record_failure()
+            else:
+                # Ошибка запроса (4xx) ничего не говорит о здоровье API: серия ошибок
+                # не сбрасывается, освобождается только пробный запрос.
+                upstream_breaker.release_probe()
+            if upstream_breaker.state != 'closed' or not retry_policy.should_retry(attempt, e):
+                raise _upstream_error(e)
+            await asyncio.sleep(retry_policy.delay(attempt))
+            attempt += 1
+            continue
+        except BaseException:
+            upstream_breaker.release_probe()
+            raise
+
+        upstream_breaker.record_success()
+        return response.json()
+
+
+async def _get_hedged(
+        api_url: str,
+        client: httpx.AsyncClient,
+        params: Optional[dict] = None
+) -> httpx.Response:
+    """
+    Если включены hedged-запросы, через перцентиль обычной длительности отправляет
+    второй такой же запрос и возвращает ответ того, кто успел первым.
+    """
+    delay = None
+    if settings.CURRENCY_API_HEDGE_ENABLED:
+        delay = upstream_latency.percentile(settings.CURRENCY_API_HEDGE_PERCENTILE)
+    if delay is None:
+        return await _get(api_url, client, params)
+
+    tasks = [asyncio.create_task(_get(api_url, client, params))]
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(api_url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f'External currency API error: {e.response.text}'
-        )
-    except httpx.RequestError as e:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f'Error communicating with external currency API: {e}'
-        )
+        done, _ = await asyncio.wait(tasks, timeout=max(delay, settings.CURRENCY_API_HEDGE_MIN_DELAY))
+        if not done:
+            upstream_latency.hedged += 1
+            tasks.append(asyncio.create_task(_get(api_url, client, params)))
 
+        error = None
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except Exception as e:
+                error = e
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-async def fetch_currencies(headers: dict) -> dict[str, Any]:
-    """Получает список всех доступных валют из внешнего API."""
 
-    api_url = f'{settings.CURRENCY_API_URL}list'
-    currencies = await send_request(api_url, headers, None)
-    if not currencies.get('success'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST
+async def _get(
+        api_url: str,
+        client: httpx.AsyncClient,
+        params: Optional[dict] = None
+) -> httpx.Response:
+    async with upstream_scheduler.slot():
+        started = time.monotonic()
+        response = await client.get(api_url, params=params)
+    response.raise_for_status()
+    upstream_latency.record(time.monotonic() - started)
+    return response
+
+
+def _upstream_error(error: Exception) -> HTTPException:
+    if isinstance(error, httpx.HTTPStatusError):
+        return HTTPException(
+            status_code=error.response.status_code,
+            detail=f'External currency API error: {error.response.text}'
         )
-    return currencies
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail=f'Error communicating with external currency API: {error}'
+    )
+
+
+class ApilayerProvider(RateProvider):
+    """Адаптер внешнего API apilayer currency_data (эндпоинты list, live и convert)."""
+
+    name = 'apilayer'
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def currencies(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        currencies = await send_request(f'{self.base_url}list', client, None)
+        if not currencies.get('success'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return currencies
+
+    async def live(
+            self,
+            source: str,
+            currencies: Optional[str],
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        params = {
+            'source': source,
+            'currencies': currencies
+        }
+        currency_rates = await send_request(f'{self.base_url}live', client, params)
+        if not currency_rates.get('success'):
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY
+            )
+        return currency_rates
+
+    async def convert(
+            self,
+            amount: float,
+            from_currency: str,
+            to_currency: str,
+            client: httpx.AsyncClient
+    ) -> dict[str, Any]:
+        params = {
+            'to': to_currency,
+            'from': from_currency,
+            'amount': amount,
+        }
+        converted_currency = await send_request(f'{self.base_url}convert', client, params)
+        if not converted_currency.get('success'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return converted_currency
+
+
+def create_provider(name: str) -> RateProvider:
+    """Создаёт источник курсов по имени из настройки CURRENCY_PROVIDERS."""
+    if name == ApilayerProvider.name:
+        return ApilayerProvider(settings.CURRENCY_API_URL)
+    if name == LocalFileProvider.name:
+        return LocalFileProvider(settings.LOCAL_RATES_FILE)
+    raise ValueError(f'Unknown currency provider: {name}')
+
+
+rate_providers = ProviderRouter(
+    providers=[create_provider(name) for name in settings.CURRENCY_PROVIDERS],
+    window=settings.PROVIDER_HEALTH_WINDOW,
+    max_error_rate=settings.PROVIDER_MAX_ERROR_RATE,
+    probe_interval=settings.PROVIDER_PROBE_INTERVAL_SECONDS,
+)
+
+
+async def fetch_currencies(client: httpx.AsyncClient) -> dict[str, Any]:
+    """Получает список всех доступных валют у самого быстрого исправного источника."""
+
+    return await rate_providers.call(lambda provider: provider.currencies(client))
 
 
 async def fetch_currency_rate(
         source: str,
         currencies: Optional[str] = None,
-        headers: dict = None
+        client: httpx.AsyncClient = None
 ) -> dict[str, Any]:
     """Получает актуальные курсы обмена относительно базовой валюты."""
 
@@ -53,17 +235,12 @@ async def fetch_currency_rate(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail='Source currency must be provided'
         )
-    params = {
-        'source': source,
-        'currencies': currencies
-    }
-    api_url = f'{settings.CURRENCY_API_URL}live'
-    currency_rates = await send_request(api_url, headers, params)
-    if not currency_rates.get('success'):
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY
-        )
+    currency_rates = await rate_providers.call(
+        lambda provider: provider.live(source, currencies, client)
+    )
 
+    if settings.RATE_HISTORY_ENABLED:
+        rate_history.record(currency_rates)
     return currency_rates
 
 
@@ -71,7 +248,7 @@ async def convert_currency(
         amount: float,
         from_currency: str,
         to_currency: str,
-        headers: dict = None
+        client: httpx.AsyncClient = None
 ) -> dict[str, Any]:
     """
     Конвертирует указанную сумму из одной валюты в другую.
@@ -87,16 +264,6 @@ async def convert_currency(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail='Both source and target currencies must be specified'
         )
-    params = {
-        'to': to_currency,
-        'from': from_currency,
-        'amount': amount,
-    }
-    api_url = f'{settings.CURRENCY_API_URL}convert'
-    converted_currency = await send_request(api_url, headers, params)
-    if not converted_currency.get('success'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST
-        )
-
-    return converted_currency
+    return await rate_providers.call(
+        lambda provider: provider.convert(amount, from_currency, to_currency, client)
+    )
@@ -1,8 +1,57 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
+from src.config import settings
 
-engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA foreign_keys=ON',
+    f'PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}',
+)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Включает WAL и настройки SQLite для каждого нового соединения."""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    """
+    Создаёт асинхронный движок БД с настройками пула из Settings.
+    Поддерживаются SQLite (aiosqlite) и Postgres (asyncpg).
+    """
+    url = make_url(database_url)
+    options = {'echo': settings.DB_ECHO}
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+    if not in_memory:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    engine = create_async_engine(url, **options)
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+    return engine
+
+
+engine = build_engine(settings.DATABASE_URL)
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -1,10 +1,49 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Annotated
 
+from fastapi import Depends, FastAPI
+
+from src.auth.cache import token_revocations, user_cache
+from src.auth.hashing import password_hasher
+from src.auth.models import User
+from src.auth.security import get_current_user
+from src.auth.sweeper import refresh_token_sweeper
+from src.currency.cache import catalogue_cache, rates_cache
+from src.config import settings
+from src.currency.client import create_api_client
+from src.currency.history import rate_history
+from src.currency.limiter import upstream_scheduler
+from src.currency.refresher import rate_refresher
+from src.currency.resilience import retry_policy, upstream_breaker, upstream_latency
 from src.currency.router import currencies_router
+from src.currency.stream import rate_broadcaster
+from src.currency.utils import rate_providers
 from src.auth.router import auth_router
+from src.cache_backends import shared_cache
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Создаёт общие ресурсы процесса и освобождает их при остановке."""
+    async with create_api_client() as api_client:
+        app.state.api_client = api_client
+        if settings.RATES_REFRESH_ENABLED:
+            rate_refresher.start(api_client)
+        if settings.RATE_HISTORY_ENABLED:
+            rate_history.start()
+        if settings.REFRESH_TOKEN_SWEEP_ENABLED:
+            refresh_token_sweeper.start()
+        yield
+        await refresh_token_sweeper.stop()
+        await rate_broadcaster.stop()
+        await rate_refresher.stop()
+        await rate_history.stop()
+    password_hasher.shutdown()
+    if shared_cache is not None:
+        await shared_cache.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get('/')
@@ -14,5 +53,26 @@ def welcome() -> dict:
     }
 
 
+@app.get('/metrics')
+def metrics(current_user: Annotated[User, Depends(get_current_user)]) -> dict:
+    """Внутренние счётчики приложения (только для авторизованных пользователей)."""
+    return {
+        'rates_cache': rates_cache.stats(),
+        'currencies_cache': catalogue_cache.stats(),
+        'rate_refresher': rate_refresher.stats(),
+        'rate_stream': rate_broadcaster.stats(),
+        'upstream': upstream_scheduler.stats(),
+        'upstream_breaker': upstream_breaker.stats(),
+        'upstream_retries': retry_policy.stats(),
+        'upstream_latency': upstream_latency.stats(),
+        'rate_providers': rate_providers.stats(),
+        'user_cache': user_cache.stats(),
+        'token_revocations': token_revocations.stats(),
+        'password_hasher': password_hasher.stats(),
+        'refresh_token_sweeper': refresh_token_sweeper.stats(),
+        'shared_cache': shared_cache.stats() if shared_cache is not None else None,
+    }
+
+
 app.include_router(currencies_router)
 app.include_router(auth_router)
@@ -0,0 +1,37 @@
+"""Rate snapshots
+
+Revision ID: 3b9d2f6c1a47
+Revises: fc16aa51e51a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6c1a47'
+down_revision: Union[str, None] = 'fc16aa51e51a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=3), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('timestamp', sa.Integer(), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_rate_snapshots_source_currency_timestamp', 'rate_snapshots', ['source', 'currency', 'timestamp'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rate_snapshots_source_currency_timestamp', table_name='rate_snapshots')
+    op.drop_table('rate_snapshots')
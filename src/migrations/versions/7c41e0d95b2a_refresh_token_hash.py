@@ -0,0 +1,86 @@
+"""Refresh token hash
+
+Revision ID: 7c41e0d95b2a
+Revises: 3b9d2f6c1a47
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e0d95b2a'
+down_revision: Union[str, None] = '3b9d2f6c1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+refresh_tokens = sa.table(
+    'refresh_tokens',
+    sa.column('id', sa.Integer()),
+    sa.column('token', sa.String(length=256)),
+    sa.column('token_hash', sa.LargeBinary(length=32)),
+    sa.column('expires_at', sa.DateTime()),
+    sa.column('is_revoked', sa.Boolean()),
+)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.LargeBinary(length=32), nullable=True))
+
+    # Истёкшие и отозванные токены больше не нужны: удаляем их до заполнения хэшей.
+    bind = op.get_bind()
+    bind.execute(refresh_tokens.delete().where(sa.or_(
+        refresh_tokens.c.is_revoked == sa.true(),
+        refresh_tokens.c.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None),
+    )))
+
+    # Хэши заполняются пачками: одна выборка по ключу и один executemany на пачку.
+    update = (
+        refresh_tokens.update()
+        .where(refresh_tokens.c.id == sa.bindparam('row_id'))
+        .values(token_hash=sa.bindparam('row_hash'))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(refresh_tokens.c.id, refresh_tokens.c.token)
+            .where(refresh_tokens.c.id > last_id)
+            .order_by(refresh_tokens.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'row_id': row_id, 'row_hash': hashlib.sha256(token.encode()).digest()}
+            for row_id, token in rows
+        ])
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.LargeBinary(length=32), nullable=False)
+        batch_op.drop_index('ix_refresh_tokens_token')
+        batch_op.drop_column('token')
+        batch_op.create_index('ix_refresh_tokens_token_hash', ['token_hash'], unique=True)
+        batch_op.create_index('ix_refresh_tokens_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Исходные токены по хэшу не восстановить, поэтому все refresh токены удаляются:
+    # после отката все пользователи будут разлогинены и должны войти заново.
+    op.execute(refresh_tokens.delete())
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index('ix_refresh_tokens_expires_at')
+        batch_op.drop_index('ix_refresh_tokens_token_hash')
+        batch_op.drop_column('token_hash')
+        batch_op.add_column(sa.Column('token', sa.String(length=256), nullable=False))
+        batch_op.create_index('ix_refresh_tokens_token', ['token'], unique=True)
@@ -2,10 +2,21 @@ from unittest.mock import patch, AsyncMock
 
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
+from src.auth.cache import access_token_cache, token_revocations, user_cache
 from src.auth.models import User
+from src.cache_backends import MemoryBackend, shared_cache
+from src.currency.cache import catalogue_cache, rates_cache
+from src.currency.history import rate_history
+from src.currency.refresher import rate_refresher
+from src.currency.resilience import retry_policy, upstream_breaker, upstream_latency
 from src.currency.router import get_api_client
+from src.currency.stream import rate_broadcaster
+from src.currency.utils import rate_providers
 from src.auth.security import get_current_user
+from src.db import Base
+from src.db_depends import get_session
 from src.main import app
 
 
@@ -28,7 +39,77 @@ async def fake_api_client():
     """
     Возвращает фиктивный API-клиент с тестовым API-ключом для подмены зависимостей.
     """
-    return {'headers': {'apikey': 'test_api_key'}}
+    async with AsyncClient(headers={'apikey': 'test_api_key'}) as client:
+        yield client
+
+
+def reset_process_state():
+    """
+    Сбрасывает внутрипроцессные кэши, счётчики и фоновые компоненты приложения.
+    """
+    rates_cache.clear()
+    catalogue_cache.clear()
+    user_cache.clear()
+    access_token_cache.clear()
+    token_revocations.clear()
+    rate_refresher.reset()
+    rate_history.clear()
+    upstream_breaker.reset()
+    retry_policy.reset()
+    upstream_latency.reset()
+    rate_providers.reset()
+    rate_broadcaster.reset()
+    if isinstance(shared_cache, MemoryBackend):
+        shared_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_caches():
+    """
+    Фикстура, очищающая внутрипроцессные кэши между тестами.
+    """
+    reset_process_state()
+    yield
+    reset_process_state()
+
+
+@pytest_asyncio.fixture()
+async def session_maker():
+    """
+    Фикстура с фабрикой сессий для чистой БД SQLite в памяти.
+    Подменяет фабрику сессий, которую использует модуль безопасности.
+    """
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    with patch('src.auth.security.async_session_maker', maker):
+        yield maker
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture()
+async def override_session(session_maker):
+    """
+    Фикстура для подмены зависимости get_session на сессию тестовой БД.
+    """
+    async def fake_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = fake_session
+    yield
+    app.dependency_overrides.pop(get_session, None)
+
+
+@pytest_asyncio.fixture()
+async def api_client():
+    """
+    Фикстура с тестовым клиентом внешнего API для прямых вызовов утилит.
+    """
+    async for client in fake_api_client():
+        yield client
 
 
 @pytest_asyncio.fixture()
@@ -1,11 +1,27 @@
+import csv
+import io
+import json
+from dataclasses import replace
+from unittest.mock import patch
+
 import pytest
 
 from pydantic import ValidationError
+from sqlalchemy import select
 
+from src.config import settings
+from src.currency.history import RateHistoryRecorder, rate_history
+from src.currency.models import RateSnapshot
+from src.currency.refresher import rate_refresher
 from src.currency.schemas import (
+    BatchConversionRequest,
+    BatchConversionResponse,
+    ColumnarConversionResponse,
+    RateHistoryResponse,
     CurrencyConversionResponse,
     CurrencyRate,
-    CurrenciesResponse
+    CurrenciesResponse,
+    MultiCurrencyRate
 )
 
 
@@ -31,6 +47,32 @@ async def test_get_currencies(
     assert 'USD' in resp.currencies
 
 
+@pytest.mark.asyncio
+async def test_get_currencies_conditional_get(
+        test_client,
+        mock_send_request_for_currencies,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует ETag и ответ 304 на If-None-Match для закэшированного списка валют.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    first = await test_client.get('/currencies', headers=headers)
+    etag = first.headers['etag']
+    assert first.headers['cache-control'].startswith('private, max-age=')
+
+    second = await test_client.get('/currencies', headers={**headers, 'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.content == b''
+    assert second.headers['etag'] == etag
+
+    third = await test_client.get('/currencies', headers={**headers, 'If-None-Match': '"other"'})
+    assert third.status_code == 200
+    assert third.json() == first.json()
+    mock_send_request_for_currencies.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_get_currency_rate(
         test_client,
@@ -62,7 +104,7 @@ async def test_get_currency_rate(
 @pytest.mark.asyncio
 async def test_get_converted_currency(
         test_client,
-        mock_send_request_for_convert,
+        mock_send_request_for_rates,
         override_api_client,
         override_current_user
 ):
@@ -86,3 +128,380 @@ async def test_get_converted_currency(
     assert resp.query.from_ == 'USD'
     assert resp.query.to == 'EUR'
     assert resp.query.amount == 2
+    assert resp.info.quote == 0.89499
+    assert resp.info.timestamp == 1747256405
+    assert resp.result == pytest.approx(1.78998)
+
+    params[0] = ('amount', 'nan')
+    response = await test_client.get('/currencies/convert', headers=headers, params=params)
+    assert response.status_code == 422
+
+    overflow = {'amount': 1e308, 'from_currency': 'USD', 'to_currency': 'RUB'}
+    for fast_json in (False, True):
+        with patch.object(settings, 'FAST_JSON_RESPONSES', fast_json):
+            response = await test_client.get('/currencies/convert', headers=headers, params=overflow)
+        assert response.status_code == 422
+        assert response.json()['detail'] == 'Conversion result is out of range'
+
+
+@pytest.mark.asyncio
+async def test_get_currency_rate_multiple_sources(
+        test_client,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует параллельную загрузку курсов для нескольких базовых валют одним запросом.
+    """
+    async def fake_send_request(api_url, client, params=None):
+        source = params['source']
+        return {
+            'success': True,
+            'timestamp': 1747256405,
+            'source': source,
+            'quotes': {f'{source}GBP': 0.75 if source == 'USD' else 0.84}
+        }
+
+    headers = {'Authorization': 'Bearer fake-token'}
+    params = [('source', 'USD'), ('source', 'EUR'), ('source', 'USD'), ('currencies', 'GBP')]
+    with patch('src.currency.utils.send_request', side_effect=fake_send_request) as mock:
+        response = await test_client.get('/currencies/rates', headers=headers, params=params)
+
+    assert response.status_code == 200
+    resp = MultiCurrencyRate.model_validate(response.json())
+    assert list(resp.rates) == ['USD', 'EUR']
+    assert resp.rates['EUR'].quotes == {'EURGBP': 0.84}
+    assert mock.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_currency_rate_is_cached(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует, что повторный запрос тех же курсов обслуживается из кэша.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    first = [('source', 'USD'), ('currencies', 'RUB'), ('currencies', 'EUR')]
+    second = [('source', 'USD'), ('currencies', 'EUR'), ('currencies', 'RUB')]
+
+    assert (await test_client.get('/currencies/rates', headers=headers, params=first)).status_code == 200
+    assert (await test_client.get('/currencies/rates', headers=headers, params=second)).status_code == 200
+
+    mock_send_request_for_rates.assert_called_once()
+    metrics = (await test_client.get('/metrics', headers=headers)).json()
+    assert metrics['rates_cache']['hits'] == 1
+    assert metrics['rates_cache']['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_requires_authorization(test_client):
+    """
+    Тестирует, что внутренние счётчики не отдаются без токена.
+    """
+    assert (await test_client.get('/metrics')).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_converted_currency_batch(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует эндпоинт /currencies/convert/batch: один запрос котировок и ошибки по элементам.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    body = {
+        'items': [
+            {'from': 'USD', 'to': 'EUR', 'amount': 2},
+            {'from': 'EUR', 'to': 'RUB', 'amount': 10},
+            {'from': 'USD', 'to': 'EUR', 'amount': 4},
+            {'from': 'USD', 'to': 'XXX', 'amount': 1},
+            {'from': 'USD', 'to': 'EUR', 'amount': -1},
+            {'from': 'USD', 'to': 'EUR', 'amount': 'nan'},
+            {'from': 'USD', 'to': 'RUB', 'amount': 1e308},
+        ]
+    }
+    response = await test_client.post('/currencies/convert/batch', headers=headers, json=body)
+    assert response.status_code == 200
+    resp = BatchConversionResponse.model_validate(response.json())
+
+    assert [item.success for item in resp.results] == [True, True, True, False, False, False, False]
+    assert resp.results[0].result == pytest.approx(2 * 0.89499)
+    assert resp.results[1].result == pytest.approx(10 * 80.374049 / 0.89499)
+    assert resp.results[3].error == 'Unknown currency: XXX'
+    assert resp.results[4].error == 'Amount must be greater than 0'
+    assert resp.results[5].error == 'Amount must be a finite number'
+    assert resp.results[5].query.amount is None
+    assert resp.results[6].error == 'Conversion result is out of range'
+    assert resp.results[6].result is None
+    mock_send_request_for_rates.assert_called_once()
+
+    with patch.object(settings, 'FAST_JSON_RESPONSES', True):
+        fast = await test_client.post('/currencies/convert/batch', headers=headers, json=body)
+    assert fast.status_code == 200
+    assert fast.json() == response.json()
+
+    too_many = {'items': body['items'][:1] * (settings.CONVERT_BATCH_MAX_ITEMS + 1)}
+    with pytest.raises(ValidationError):
+        BatchConversionRequest.model_validate(too_many)
+
+
+@pytest.mark.asyncio
+async def test_get_converted_currency_columnar(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует эндпоинт /currencies/convert/columnar с параллельными массивами.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    body = {'amount': [2, 10, 5], 'from': ['USD', 'EUR', 'USD'], 'to': ['EUR', 'RUB', 'XXX']}
+    response = await test_client.post('/currencies/convert/columnar', headers=headers, json=body)
+    assert response.status_code == 200
+    resp = ColumnarConversionResponse.model_validate(response.json())
+
+    assert resp.timestamp == 1747256405
+    assert resp.result[0] == pytest.approx(1.78998)
+    assert resp.result[2] is None
+    assert resp.invalid == [2]
+
+    overflow = {'amount': [1e308], 'from': ['USD'], 'to': ['RUB']}
+    for fast_json in (False, True):
+        with patch.object(settings, 'FAST_JSON_RESPONSES', fast_json):
+            response = await test_client.post('/currencies/convert/columnar', headers=headers, json=overflow)
+        assert response.status_code == 200
+        assert response.json()['result'] == [None]
+        assert response.json()['invalid'] == [0]
+
+
+@pytest.mark.asyncio
+async def test_fast_json_responses_match_models(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует, что быстрый путь сериализации через orjson отдаёт те же данные, что и модели.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    requests = [
+        ('GET', '/currencies/rates', {'params': [('source', 'USD')]}),
+        ('GET', '/currencies/convert', {'params': {'amount': 2, 'from_currency': 'USD', 'to_currency': 'EUR'}}),
+        ('POST', '/currencies/convert/batch', {'json': {'items': [
+            {'from': 'USD', 'to': 'EUR', 'amount': 2},
+            {'from': 'USD', 'to': 'XXX', 'amount': 1},
+        ]}}),
+        ('POST', '/currencies/convert/columnar', {'json': {
+            'amount': [2, 5], 'from': ['USD', 'USD'], 'to': ['EUR', 'XXX'],
+        }}),
+    ]
+    for method, url, kwargs in requests:
+        expected = await test_client.request(method, url, headers=headers, **kwargs)
+        with patch.object(settings, 'FAST_JSON_RESPONSES', True):
+            fast = await test_client.request(method, url, headers=headers, **kwargs)
+        assert fast.status_code == expected.status_code == 200
+        assert fast.json() == expected.json()
+
+
+@pytest.mark.asyncio
+async def test_export_cross_rates_streams_ndjson(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует потоковую выгрузку матрицы кросс-курсов в формате NDJSON.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    async with test_client.stream('GET', '/currencies/export/rates', headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        rows = [json.loads(line) async for line in response.aiter_lines() if line]
+
+    assert len(rows) == 9
+    pair = next(row for row in rows if row['from'] == 'EUR' and row['to'] == 'RUB')
+    assert pair['quote'] == pytest.approx(80.374049 / 0.89499)
+    assert pair['timestamp'] == 1747256405
+
+
+@pytest.mark.asyncio
+async def test_export_conversions_streams_csv(
+        test_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует конвертацию переданного CSV-файла с потоковой выгрузкой результата в CSV.
+    """
+    headers = {'Authorization': 'Bearer fake-token', 'Content-Type': 'text/csv'}
+    body = b'amount,from,to\n2,USD,EUR\r\n10,EUR,RUB\nbad row\n1,USD,XXX\n1,,EUR\n\xff\xfe,USD,EUR\nnan,USD,EUR\n'
+    response = await test_client.post(
+        '/currencies/export/convert', params={'format': 'csv'}, headers=headers, content=body
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row['from'] for row in rows] == ['USD', 'EUR', '', 'USD', '', '', '']
+    assert float(rows[0]['result']) == pytest.approx(2 * 0.89499)
+    assert rows[2]['error'] == 'Invalid row: bad row'
+    assert rows[3]['error'] == 'Unknown currency: XXX'
+    assert rows[4]['error'] == 'Unknown currency: '
+    assert rows[5]['error'] == 'Invalid row: \ufffd\ufffd,USD,EUR'
+    assert rows[6]['error'] == 'Invalid row: nan,USD,EUR'
+
+
+@pytest.mark.asyncio
+async def test_rates_and_convert_served_from_refresher_snapshot(
+        test_client,
+        api_client,
+        mock_send_request_for_rates,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует, что после фонового обновления курсы и конвертация берутся из снимка без запросов к API.
+    """
+    await rate_refresher.refresh(api_client)
+    assert rate_refresher.snapshot.version == 1
+    mock_send_request_for_rates.reset_mock()
+
+    headers = {'Authorization': 'Bearer fake-token'}
+    rates = await test_client.get('/currencies/rates', headers=headers, params={'currencies': 'EUR'})
+    convert = await test_client.get(
+        '/currencies/convert',
+        headers=headers,
+        params={'amount': 2, 'from_currency': 'EUR', 'to_currency': 'RUB'},
+    )
+
+    assert rates.json()['quotes'] == {'USDEUR': 0.89499}
+    assert convert.json()['result'] == pytest.approx(2 * 80.374049 / 0.89499)
+    mock_send_request_for_rates.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresher_unchanged_quotes_keep_snapshot_fresh(api_client, mock_send_request_for_rates):
+    """
+    Тестирует, что успешное обновление с теми же курсами продлевает свежесть снимка, не меняя версию.
+    """
+    await rate_refresher.refresh(api_client)
+    rate_refresher.snapshot = replace(rate_refresher.snapshot, updated_at=0.0)
+    assert rate_refresher.get('USD') is None
+
+    await rate_refresher.refresh(api_client)
+
+    assert rate_refresher.snapshot.version == 1
+    assert rate_refresher.get('USD')['quotes'] == {'USDEUR': 0.89499, 'USDRUB': 80.374049}
+
+
+@pytest.mark.asyncio
+async def test_get_rate_history(
+        test_client,
+        session_maker,
+        override_session,
+        override_current_user
+):
+    """
+    Тестирует запись котировок в историю и выдачу свечей OHLC через /currencies/history.
+    """
+    for timestamp, rate in ((3600, 0.9), (3700, 0.95), (3800, 0.85), (7300, 0.92)):
+        rate_history.record({'source': 'USD', 'timestamp': timestamp, 'quotes': {'USDEUR': rate}})
+    rate_history.record({'source': 'USD', 'timestamp': 3700, 'quotes': {'USDEUR': 1.0}})
+    assert await rate_history.flush(session_maker) == 4
+
+    headers = {'Authorization': 'Bearer fake-token'}
+    params = {'currency': 'eur', 'start': '1970-01-01T00:00:00', 'end': '1970-01-01T03:00:00'}
+    response = await test_client.get('/currencies/history', headers=headers, params=params)
+    assert response.status_code == 200
+    resp = RateHistoryResponse.model_validate(response.json())
+
+    assert [candle.model_dump() for candle in resp.candles] == [
+        {'timestamp': 3600, 'open': 0.9, 'high': 0.95, 'low': 0.85, 'close': 0.85, 'count': 3},
+        {'timestamp': 7200, 'open': 0.92, 'high': 0.92, 'low': 0.92, 'close': 0.92, 'count': 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rate_history_keeps_partial_fetches_and_failed_batches(session_maker):
+    """
+    Тестирует, что частичный ответ не мешает записать остальные валюты с тем же timestamp,
+    строки возвращаются в буфер, если запись в БД не удалась, а котировки, полученные
+    во время записи, не вытесняются из заполненного буфера.
+    """
+    recorder = RateHistoryRecorder(batch_size=2, flush_interval=60, max_buffer=3)
+    recorder.record({'source': 'USD', 'timestamp': 100, 'quotes': {'USDEUR': 0.9}})
+    recorder.record({'source': 'USD', 'timestamp': 100, 'quotes': {'USDEUR': 0.9, 'USDGBP': 0.75}})
+
+    def failing_maker():
+        recorder.record({'source': 'USD', 'timestamp': 200, 'quotes': {'USDEUR': 0.91, 'USDGBP': 0.76}})
+        raise RuntimeError('database is down')
+
+    with pytest.raises(RuntimeError):
+        await recorder.flush(failing_maker)
+
+    assert await recorder.flush(session_maker) == 3
+    assert await recorder.flush(session_maker) == 0
+    async with session_maker() as db:
+        stored = (await db.execute(
+            select(RateSnapshot.currency, RateSnapshot.timestamp).order_by(RateSnapshot.id)
+        )).all()
+    assert sorted(stored) == [('EUR', 200), ('GBP', 100), ('GBP', 200)]
+
+
+@pytest.mark.asyncio
+async def test_rate_history_drops_rows_that_cannot_be_stored(session_maker):
+    """
+    Тестирует, что строка, отклонённая БД из-за данных, отбрасывается, а остальные строки
+    пакета записываются и буфер не блокируется.
+    """
+    recorder = RateHistoryRecorder(batch_size=10, flush_interval=60, max_buffer=100)
+    recorder.record({'source': 'USD', 'timestamp': 100, 'quotes': {'USDEUR': 0.9, 'USDBAD': None, 'USDGBP': 0.75}})
+
+    assert await recorder.flush(session_maker) == 2
+    assert await recorder.flush(session_maker) == 0
+    async with session_maker() as db:
+        stored = (await db.execute(select(RateSnapshot.currency).order_by(RateSnapshot.currency))).scalars().all()
+    assert stored == ['EUR', 'GBP']
+
+
+@pytest.mark.asyncio
+async def test_stream_currency_rates_normalizes_and_validates_source(
+        test_client,
+        mock_send_request_for_currencies,
+        override_api_client,
+        override_current_user
+):
+    """
+    Тестирует, что коды валют потока приводятся к верхнему регистру, а неизвестная базовая
+    валюта отклоняется без запуска опроса внешнего API.
+    """
+    headers = {'Authorization': 'Bearer fake-token'}
+    subscriptions = []
+
+    async def fake_sse_events(source, currencies, client, keepalive):
+        subscriptions.append((source, currencies))
+        yield b': keepalive\n\n'
+
+    with patch('src.currency.router.sse_events', fake_sse_events):
+        for source in ('usd', 'eur'):
+            params = [('source', source), ('currencies', 'rub'), ('currencies', 'Jpy')]
+            response = await test_client.get('/currencies/stream', headers=headers, params=params)
+            assert response.status_code == 200
+
+        response = await test_client.get('/currencies/stream', headers=headers, params={'source': 'xxx'})
+
+    assert response.status_code == 422
+    assert response.json()['detail'] == 'Unknown source currency: XXX'
+    assert subscriptions == [('USD', ['RUB', 'JPY']), ('EUR', ['RUB', 'JPY'])]
+    mock_send_request_for_currencies.assert_awaited_once()
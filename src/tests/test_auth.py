@@ -0,0 +1,309 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import event, func, select, update
+
+from src.auth.cache import token_revocations
+from src.auth.hashing import PasswordHasher
+from src.auth.models import User
+from src.auth.models import RefreshToken
+from src.auth.security import (
+    create_access_token,
+    create_refresh_token,
+    get_current_user,
+    hash_token,
+    verify_access_token,
+)
+from src.auth.sweeper import RefreshTokenSweeper
+from src.config import settings
+
+
+async def create_test_user(session_maker) -> User:
+    """Создаёт активного пользователя в тестовой БД."""
+    async with session_maker() as db:
+        user = User(
+            first_name='test_user',
+            last_name='test_user',
+            username='test_username',
+            email='testuser@test.com',
+            hashed_password='test_hash',
+            is_active=True,
+        )
+        db.add(user)
+        await db.commit()
+        return user
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_revocation_map(session_maker):
+    """
+    Тестирует, что повторная авторизация тем же пользователем не обращается к БД,
+    а первая читает только поле is_active.
+    """
+    user = await create_test_user(session_maker)
+    token = create_access_token(user.username, user.id, timedelta(minutes=5))
+
+    statements = []
+    engine = session_maker.kw['bind'].sync_engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        first = await get_current_user(token)
+        second = await get_current_user(token)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert first.id == second.id == user.id
+    assert second.username == 'test_username'
+    assert len(statements) == 1
+    assert 'hashed_password' not in statements[0]
+    assert token_revocations.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_revoked_on_deactivation(session_maker):
+    """
+    Тестирует, что деактивация пользователя через ORM сразу отзывает его токены,
+    а после повторной активации действуют только новые токены.
+    """
+    user = await create_test_user(session_maker)
+    with patch('src.auth.security.datetime') as mock_datetime:
+        mock_datetime.now.return_value = datetime.now(timezone.utc) - timedelta(seconds=5)
+        token = create_access_token(user.username, user.id, timedelta(minutes=5))
+    await get_current_user(token)
+
+    with patch('src.auth.cache.time') as mock_time:
+        mock_time.monotonic = time.monotonic
+        mock_time.time.return_value = time.time() - 2
+        async with session_maker() as db:
+            db_user = await db.get(User, user.id)
+            db_user.is_active = False
+            await db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(token)
+    assert exc_info.value.status_code == 401
+
+    async with session_maker() as db:
+        await db.execute(update(User).where(User.id == user.id).values(is_active=True))
+        await db.commit()
+    token_revocations.check_interval = 0
+    try:
+        with pytest.raises(HTTPException):
+            await get_current_user(token)
+        new_token = create_access_token(user.username, user.id, timedelta(minutes=5))
+        assert (await get_current_user(new_token)).id == user.id
+    finally:
+        token_revocations.check_interval = settings.TOKEN_REVOCATION_CHECK_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rechecks_database(session_maker):
+    """
+    Тестирует, что деактивация в обход ORM вступает в силу после периода перепроверки.
+    """
+    user = await create_test_user(session_maker)
+    token = create_access_token(user.username, user.id, timedelta(minutes=5))
+    with patch.object(token_revocations, 'check_interval', 60):
+        await get_current_user(token)
+
+        async with session_maker() as db:
+            await db.execute(update(User).where(User.id == user.id).values(is_active=False))
+            await db.commit()
+        assert (await get_current_user(token)).id == user.id
+
+    with patch.object(token_revocations, 'check_interval', 0):
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(token)
+    assert exc_info.value.status_code == 401
+    assert token_revocations.stats()['checks'] == 2
+
+
+@pytest.mark.asyncio
+async def test_read_current_user_profile(session_maker, override_session, test_client):
+    """
+    Тестирует, что /auth/read_current_user отдаёт полные данные пользователя из БД.
+    """
+    user = await create_test_user(session_maker)
+    token = create_access_token(user.username, user.id, timedelta(minutes=5))
+
+    response = await test_client.get('/auth/read_current_user', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    assert response.json()['email'] == 'testuser@test.com'
+
+
+def test_verify_access_token_decodes_once():
+    """
+    Тестирует, что повторная проверка того же access токена не вызывает jwt.decode.
+    """
+    token = create_access_token('test_username', 1, timedelta(minutes=5))
+
+    with patch('src.auth.security.jwt.decode', wraps=jwt.decode) as mock_decode:
+        first = verify_access_token(token)
+        second = verify_access_token(token)
+
+    assert first == second
+    assert first['username'] == 'test_username' and first['id'] == 1 and first['iat'] > 0
+    mock_decode.assert_called_once()
+
+
+def test_verify_access_token_cached_expiry():
+    """
+    Тестирует, что срок действия токена проверяется и для закэшированного токена.
+    """
+    token = create_access_token('test_username', 1, timedelta(minutes=5))
+    verify_access_token(token)
+
+    with patch('src.auth.security.datetime') as mock_datetime:
+        mock_datetime.now.return_value.timestamp.return_value = 2 ** 40
+        with pytest.raises(HTTPException) as exc_info:
+            verify_access_token(token)
+
+    assert exc_info.value.detail == 'Access token expired!'
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_runs_in_pool():
+    """
+    Тестирует хэширование и проверку пароля в пуле и метрики очереди.
+    """
+    hasher = PasswordHasher(executor_type='thread', workers=2, max_queue=10)
+    fast_context = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4)
+
+    with patch('src.auth.hashing.bcrypt_context', fast_context):
+        hashed = await hasher.hash('secret')
+        results = await asyncio.gather(
+            *(hasher.verify(password, hashed) for password in ('secret', 'wrong', 'secret'))
+        )
+    hasher.shutdown()
+
+    assert results == [True, False, True]
+    stats = hasher.stats()
+    assert stats['completed'] == 4
+    assert stats['queued'] == stats['active'] == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_queue_full():
+    """
+    Тестирует отказ с кодом 503 при переполнении очереди хэширования.
+    """
+    hasher = PasswordHasher(executor_type='thread', workers=1, max_queue=0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await hasher.hash('secret')
+
+    assert exc_info.value.status_code == 503
+    assert hasher.stats()['rejected'] == 1
+
+
+async def create_test_refresh_token(session_maker, user: User, **kwargs) -> str:
+    """Создаёт refresh токен пользователя и его запись в тестовой БД."""
+    token = create_refresh_token(user.username, user.id, timedelta(days=1))
+    async with session_maker() as db:
+        db.add(RefreshToken(
+            token_hash=hash_token(token),
+            user_id=user.id,
+            expires_at=kwargs.get('expires_at', datetime.now(timezone.utc) + timedelta(days=1)),
+            is_revoked=kwargs.get('is_revoked', False),
+        ))
+        await db.commit()
+    return token
+
+
+def record_statements(session_maker) -> tuple[list[str], callable]:
+    """Подписывается на SQL-запросы тестовой БД, возвращает список запросов и функцию отписки."""
+    statements = []
+    engine = session_maker.kw['bind'].sync_engine
+    listener = lambda *args: statements.append(args[2].lstrip().split()[0].upper())
+    event.listen(engine, 'before_cursor_execute', listener)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', listener)
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_token_in_one_transaction(test_client, session_maker, override_session):
+    """
+    Тестирует обновление токенов: UPDATE ... RETURNING старого токена и INSERT нового без SELECT.
+    """
+    user = await create_test_user(session_maker)
+    token = await create_test_refresh_token(session_maker, user)
+
+    statements, stop = record_statements(session_maker)
+    try:
+        response = await test_client.post('/auth/refresh', json={'refresh_token': token})
+    finally:
+        stop()
+
+    assert response.status_code == 200
+    assert statements == ['UPDATE', 'INSERT']
+
+    reused = await test_client.post('/auth/refresh', json={'refresh_token': token})
+    assert reused.status_code == 401
+
+    rotated = await test_client.post('/auth/refresh', json={'refresh_token': response.json()['refresh_token']})
+    assert rotated.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_login_and_register_round_trips(test_client, session_maker, override_session):
+    """
+    Тестирует число запросов при входе и регистрацию без предварительной проверки SELECT.
+    """
+    fast_context = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4)
+    body = {
+        'first_name': 'test_user',
+        'last_name': 'test_user',
+        'username': 'new_user',
+        'email': 'new_user@test.com',
+        'password': 'secret',
+    }
+    with patch('src.auth.hashing.bcrypt_context', fast_context):
+        statements, stop = record_statements(session_maker)
+        try:
+            registered = await test_client.post('/auth/register', json=body)
+            duplicate = await test_client.post('/auth/register', json={**body, 'email': 'other@test.com'})
+            assert statements == ['INSERT', 'INSERT']
+
+            statements.clear()
+            login = await test_client.post('/auth/token', data={'username': 'new_user', 'password': 'secret'})
+            assert statements == ['SELECT', 'INSERT']
+        finally:
+            stop()
+
+    assert registered.status_code == 201
+    assert duplicate.status_code == 400
+    assert duplicate.json()['detail'] == 'User already exists'
+    assert login.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_sweeper_deletes_in_batches(session_maker):
+    """
+    Тестирует пакетное удаление истёкших и отозванных refresh токенов.
+    """
+    user = await create_test_user(session_maker)
+    async with session_maker() as db:
+        now = datetime.now(timezone.utc)
+        db.add_all(
+            RefreshToken(
+                token_hash=bytes([i]) * 32,
+                user_id=user.id,
+                expires_at=now + timedelta(days=1 if i < 2 else -1),
+                is_revoked=i == 1,
+            )
+            for i in range(7)
+        )
+        await db.commit()
+
+    sweeper = RefreshTokenSweeper(batch_size=2, interval=60)
+    assert await sweeper.sweep(session_maker) == 6
+
+    async with session_maker() as db:
+        assert await db.scalar(select(func.count()).select_from(RefreshToken)) == 1
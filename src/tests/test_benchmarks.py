@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+from passlib.context import CryptContext
+
+from benchmarks.fake_api import FakeCurrencyApi
+from benchmarks.load import compare_reports, percentile, run_load
+from src.currency.router import get_api_client
+from src.main import app
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_all_scenarios(session_maker, override_session, test_client):
+    """
+    Тестирует прогон нагрузочных сценариев против фейкового API: все запросы успешны,
+    повторные запросы курсов обслуживаются из кэша, а для сценариев авторизации
+    считается число SQL-запросов.
+    """
+    fake_api = FakeCurrencyApi(latency=0.001)
+
+    async def fake_api_client():
+        async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=fake_api.app),
+                headers={'apikey': 'test_api_key'},
+        ) as client:
+            yield client
+
+    app.dependency_overrides[get_api_client] = fake_api_client
+    fast_context = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4)
+    try:
+        with patch('src.auth.hashing.bcrypt_context', fast_context):
+            results = await run_load(
+                test_client,
+                scenarios=['currencies', 'rates', 'convert', 'login', 'refresh', 'read_current_user'],
+                concurrency_levels=[1, 3],
+                requests=6,
+                cpu_bound_requests=2,
+                warmup=1,
+                engine=session_maker.kw['bind'],
+            )
+    finally:
+        app.dependency_overrides.pop(get_api_client, None)
+
+    assert [(result['scenario'], result['concurrency']) for result in results][:2] == [
+        ('currencies', 1), ('currencies', 3)
+    ]
+    assert len(results) == 12
+    assert all(result['errors'] == 0 for result in results), results
+    assert all(result['latency_ms']['p50'] <= result['latency_ms']['p99'] for result in results)
+    assert fake_api.calls['list'] == 1
+
+    queries = {result['scenario']: result.get('queries_per_request') for result in results}
+    assert queries['refresh'] == 2
+    assert queries['login'] >= 1
+    assert queries['currencies'] is None
+
+
+def test_compare_reports_flags_regressions():
+    """
+    Тестирует поиск регрессий: падение RPS, рост p99, новые ошибки сверх допуска
+    и рост числа SQL-запросов на запрос.
+    """
+    def report(rps: float, p99: float, errors: int = 0) -> dict:
+        return {'results': [
+            {'scenario': 'rates', 'concurrency': 10, 'rps': rps, 'errors': errors, 'latency_ms': {'p99': p99}}
+        ]}
+
+    assert compare_reports(report(950, 11), report(1000, 10), max_regression=0.2) == []
+    regressions = compare_reports(report(700, 15, errors=1), report(1000, 10), max_regression=0.2)
+    assert len(regressions) == 3
+
+    slower, baseline = report(1000, 10), report(1000, 10)
+    slower['results'][0]['queries_per_request'] = 3.0
+    baseline['results'][0]['queries_per_request'] = 2.0
+    assert compare_reports(slower, baseline, max_regression=0.2) == ['rates x10: queries per request 2.00 -> 3.00']
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
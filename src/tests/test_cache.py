@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import HTTPException
+
+from src.currency.cache import RateCache
+
+
+@pytest.mark.asyncio
+async def test_rate_cache_hit_and_lru_eviction():
+    """
+    Тестирует попадание в кэш и вытеснение самой старой записи при переполнении.
+    """
+    cache = RateCache(ttl=60, max_size=2, max_stale=60)
+    loader = AsyncMock(side_effect=lambda: {'n': loader.await_count})
+
+    assert await cache.get('a', loader) == {'n': 1}
+    assert await cache.get('a', loader) == {'n': 1}
+    await cache.get('b', loader)
+    await cache.get('c', loader)
+    await cache.get('a', loader)
+
+    assert loader.await_count == 4
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'stale': 0, 'shared_hits': 0, 'size': 2}
+
+
+@pytest.mark.asyncio
+async def test_rate_cache_serves_stale_and_refreshes_once():
+    """
+    Тестирует, что просроченная запись отдаётся сразу, а обновляет её одна фоновая задача.
+    """
+    cache = RateCache(ttl=0, max_size=10, max_stale=60)
+    loader = AsyncMock(return_value='old')
+    await cache.get('key', loader)
+
+    loader.return_value = 'new'
+    results = await asyncio.gather(*(cache.get('key', loader) for _ in range(5)))
+    assert results == ['old'] * 5
+
+    await asyncio.sleep(0)
+    assert loader.await_count == 2
+    assert cache.stats()['stale'] == 5
+    assert cache._entries['key'][1] == 'new'
+
+
+@pytest.mark.asyncio
+async def test_rate_cache_serves_expired_entry_when_upstream_unavailable():
+    """
+    Тестирует, что при недоступности внешнего API отдаётся последняя сохранённая запись.
+    """
+    cache = RateCache(ttl=0, max_size=10, max_stale=0)
+    await cache.get('key', AsyncMock(return_value='old'))
+
+    loader = AsyncMock(side_effect=HTTPException(status_code=503))
+    assert await cache.get('key', loader) == 'old'
+
+    loader.side_effect = HTTPException(status_code=404)
+    with pytest.raises(HTTPException):
+        await cache.get('key', loader)
@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.auth.cache import UserCache
+from src.auth.models import User
+from src.cache_backends import MemoryBackend, RedisBackend
+from src.currency.cache import CachedResponse, RateCache
+
+
+class FakeRedis:
+    """
+    Минимальный клиент с командами Redis GET/SET PX/DELETE поверх словаря.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_rate_cache_shares_entries_between_workers():
+    """
+    Тестирует, что значение, загруженное одним воркером, читается другим без обращения к API.
+    """
+    backend = RedisBackend(FakeRedis())
+    first = RateCache(ttl=60, max_size=10, max_stale=60, backend=backend)
+    second = RateCache(ttl=60, max_size=10, max_stale=60, backend=backend)
+    loader = AsyncMock(return_value={'source': 'USD', 'quotes': {'USDEUR': 0.9}})
+
+    await first.get(('USD', ()), loader)
+    assert await second.get(('USD', ()), loader) == {'source': 'USD', 'quotes': {'USDEUR': 0.9}}
+
+    loader.assert_awaited_once()
+    assert second.stats()['shared_hits'] == 1
+    assert second.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_catalogue_cache_restores_cached_response():
+    """
+    Тестирует, что заранее сериализованный ответ восстанавливается из общего хранилища с тем же ETag.
+    """
+    backend = MemoryBackend(max_size=10)
+    kwargs = dict(ttl=60, max_size=1, max_stale=60, backend=backend, namespace='currencies',
+                  dump=lambda response: response.content, load=CachedResponse.from_content)
+    response = CachedResponse.from_content(b'{"success":true}')
+
+    await RateCache(**kwargs).get('currencies', AsyncMock(return_value=response))
+    assert await RateCache(**kwargs).get('currencies', AsyncMock()) == response
+
+
+@pytest.mark.asyncio
+async def test_user_cache_shared_and_invalidated():
+    """
+    Тестирует общий кэш пользователей и удаление записи из общего хранилища при инвалидации.
+    """
+    backend = MemoryBackend(max_size=10)
+    user = User(id=1, first_name='a', last_name='b', username='user', email='u@test.com', is_active=True)
+    await UserCache(ttl=60, max_size=10, backend=backend).set(user)
+
+    other = UserCache(ttl=60, max_size=10, backend=backend)
+    assert (await other.get(1)).username == 'user'
+    assert other.stats()['shared_hits'] == 1
+
+    other.invalidate(1)
+    await asyncio.sleep(0)
+    assert await UserCache(ttl=60, max_size=10, backend=backend).get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_errors_are_misses():
+    """
+    Тестирует, что недоступность Redis не ломает запрос, а считается промахом.
+    """
+    client = AsyncMock()
+    client.get.side_effect = ConnectionError('redis is down')
+    client.set.side_effect = ConnectionError('redis is down')
+    backend = RedisBackend(client)
+    cache = RateCache(ttl=60, max_size=10, max_stale=60, backend=backend)
+
+    assert await cache.get('key', AsyncMock(return_value=1)) == 1
+    assert backend.stats() == {'errors': 2}
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.currency.converter import ConversionEngine
+
+
+RATES = {
+    'success': True,
+    'timestamp': 1747256405,
+    'source': 'USD',
+    'quotes': {
+        'USDEUR': 0.89499,
+        'USDRUB': 80.374049
+    }
+}
+
+
+def test_conversion_engine_cross_rate():
+    """
+    Тестирует конвертацию между двумя не-USD валютами через кросс-курс.
+    """
+    engine = ConversionEngine()
+    engine.load(RATES)
+
+    conversion = engine.convert(10, 'EUR', 'RUB')
+
+    assert conversion['query'] == {'from': 'EUR', 'to': 'RUB', 'amount': 10}
+    assert conversion['info']['quote'] == pytest.approx(80.374049 / 0.89499)
+    assert conversion['info']['timestamp'] == 1747256405
+    assert conversion['result'] == pytest.approx(10 * 80.374049 / 0.89499)
+
+
+def test_conversion_engine_unknown_currency():
+    """
+    Тестирует ошибку при конвертации в валюту, которой нет в таблице котировок.
+    """
+    engine = ConversionEngine()
+    engine.load(RATES)
+
+    with pytest.raises(HTTPException) as exc_info:
+        engine.convert(1, 'USD', 'XXX')
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize('amount', [float('nan'), float('inf'), float('-inf')])
+def test_conversion_engine_rejects_non_finite_amount(amount):
+    """
+    Тестирует ответ 422 вместо NaN/inf в результате для нечисловых сумм.
+    """
+    engine = ConversionEngine()
+    engine.load(RATES)
+
+    with pytest.raises(HTTPException) as exc_info:
+        engine.convert(amount, 'USD', 'EUR')
+    assert exc_info.value.status_code == 422
+
+
+def test_conversion_engine_rejects_overflowing_result():
+    """
+    Тестирует ответ 422, когда конечная сумма при умножении на курс даёт inf.
+    """
+    engine = ConversionEngine()
+    engine.load(RATES)
+
+    with pytest.raises(HTTPException) as exc_info:
+        engine.convert(1e308, 'USD', 'RUB')
+    assert exc_info.value.status_code == 422
+    assert exc_info.value.detail == 'Conversion result is out of range'
+
+
+def test_conversion_engine_convert_many():
+    """
+    Тестирует векторную конвертацию массивов, включая неизвестные валюты и неположительные суммы.
+    """
+    engine = ConversionEngine()
+    engine.load(RATES)
+
+    quotes, results, invalid = engine.convert_many(
+        [2, 10, 1, 0, float('inf'), 1e308],
+        ['USD', 'eur', 'USD', 'USD', 'USD', 'USD'],
+        ['EUR', 'RUB', 'XXX', 'EUR', 'EUR', 'RUB'],
+    )
+
+    assert invalid.tolist() == [False, False, True, True, True, True]
+    assert quotes[0] == pytest.approx(0.89499)
+    assert results[0] == pytest.approx(2 * 0.89499)
+    assert results[1] == pytest.approx(10 * 80.374049 / 0.89499)
+    assert np.isnan(results[2]) and np.isnan(results[3])
+    assert np.isnan(quotes[5]) and np.isnan(results[5])
@@ -0,0 +1,20 @@
+import pytest
+from sqlalchemy import text
+
+from src.db import build_engine
+
+
+@pytest.mark.asyncio
+async def test_sqlite_engine_uses_wal(tmp_path):
+    """
+    Тестирует, что для файловой SQLite включаются WAL и настройки соединения.
+    """
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "test.db"}')
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text('PRAGMA journal_mode'))
+        foreign_keys = await conn.scalar(text('PRAGMA foreign_keys'))
+    await engine.dispose()
+
+    assert journal_mode == 'wal'
+    assert foreign_keys == 1
+    assert engine.pool.size() == 5
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.currency.limiter import (
+    BACKGROUND_PRIORITY,
+    USER_PRIORITY,
+    UpstreamScheduler,
+)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency_and_prefers_user_requests():
+    """
+    Тестирует лимит одновременных запросов и приоритет пользовательских запросов над фоновыми.
+    """
+    scheduler = UpstreamScheduler(rate=0, burst=1, max_concurrency=1, queue_timeout=1)
+    order = []
+
+    async def request(name: str, priority: int) -> None:
+        await scheduler.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0.01)
+        scheduler.release()
+
+    await scheduler.acquire(USER_PRIORITY)
+    tasks = [
+        asyncio.create_task(request('background', BACKGROUND_PRIORITY)),
+        asyncio.create_task(request('user', USER_PRIORITY)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()['queue_depth'] == 2
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ['user', 'background']
+    assert scheduler.stats()['completed'] == 3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_after_queue_deadline():
+    """
+    Тестирует отказ с кодом 503, если токен не появился до дедлайна ожидания.
+    """
+    scheduler = UpstreamScheduler(rate=1, burst=1, max_concurrency=10, queue_timeout=0.05)
+    await scheduler.acquire(USER_PRIORITY)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await scheduler.acquire(USER_PRIORITY)
+
+    assert exc_info.value.status_code == 503
+    assert scheduler.stats()['rejected'] == 1
+    assert scheduler.stats()['queue_depth'] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_spaces_requests_by_rate():
+    """
+    Тестирует, что после исчерпания всплеска запросы пропускаются со скоростью rate.
+    """
+    scheduler = UpstreamScheduler(rate=50, burst=1, max_concurrency=10, queue_timeout=1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    for _ in range(3):
+        await scheduler.acquire(USER_PRIORITY)
+        scheduler.release()
+
+    assert loop.time() - started >= 0.035
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from src.currency.providers import LocalFileProvider, ProviderRouter, RateProvider
+
+
+class StubProvider(RateProvider):
+    """
+    Тестовый источник курсов, возвращающий заданный ответ или ошибку.
+    """
+
+    def __init__(self, name: str, result=None, error: Exception = None, delay: float = 0.0):
+        self.name = name
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    async def currencies(self, client):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+    async def live(self, source, currencies, client):
+        return await self.currencies(client)
+
+    async def convert(self, amount, from_currency, to_currency, client):
+        return await self.currencies(client)
+
+
+@pytest.mark.asyncio
+async def test_local_file_provider_computes_cross_rates(tmp_path):
+    """
+    Тестирует кросс-курсы и конвертацию по котировкам из локального файла.
+    """
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({
+        'timestamp': 1747256405,
+        'source': 'USD',
+        'quotes': {'USDEUR': 0.5, 'USDRUB': 80.0},
+    }))
+    provider = LocalFileProvider(str(path))
+
+    rates = await provider.live('EUR', 'USD,RUB', None)
+    assert rates['quotes'] == {'EURUSD': 2.0, 'EURRUB': 160.0}
+    assert (await provider.convert(3, 'EUR', 'RUB', None))['result'] == 480.0
+    assert set((await provider.currencies(None))['currencies']) == {'USD', 'EUR', 'RUB'}
+
+    with pytest.raises(HTTPException) as exc_info:
+        await provider.live('XXX', None, None)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_provider_router_falls_back_and_demotes_failing_provider():
+    """
+    Тестирует переход к следующему источнику при сбое и понижение источника с высокой долей ошибок.
+    """
+    broken = StubProvider('broken', error=HTTPException(status_code=503))
+    backup = StubProvider('backup', result={'success': True})
+    router = ProviderRouter([broken, backup], window=10, max_error_rate=0.5)
+
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True}
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True}
+
+    assert broken.calls == 1
+    assert backup.calls == 2
+    assert router.stats()['broken']['healthy'] is False
+
+
+@pytest.mark.asyncio
+async def test_provider_router_fails_over_on_rate_limit():
+    """
+    Тестирует, что ответ 429 считается сбоем источника и запрос уходит к следующему.
+    """
+    limited = StubProvider('limited', error=HTTPException(status_code=429))
+    backup = StubProvider('backup', result={'success': True})
+    router = ProviderRouter([limited, backup], window=10, max_error_rate=0.5)
+
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True}
+
+    assert limited.calls == 1
+    assert backup.calls == 1
+    assert router.stats()['limited']['errors'] == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_router_probes_and_restores_demoted_provider():
+    """
+    Тестирует, что пониженный источник получает пробный запрос и после успешной пробы
+    снова становится первым, а неудачная проба не ломает запрос.
+    """
+    flaky = StubProvider('flaky', error=HTTPException(status_code=503))
+    backup = StubProvider('backup', result={'success': True}, delay=0.01)
+    router = ProviderRouter([flaky, backup], window=10, max_error_rate=0.5, probe_interval=0)
+
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True}
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True}
+    assert flaky.calls == 2
+    assert router.stats()['flaky']['healthy'] is False
+
+    flaky.error, flaky.result = None, {'success': True, 'source': 'flaky'}
+    assert await router.call(lambda provider: provider.currencies(None)) == {'success': True, 'source': 'flaky'}
+
+    assert router.stats()['flaky']['healthy'] is True
+    assert router.ranked()[0] is flaky
+    assert backup.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_provider_router_does_not_fall_back_on_client_errors():
+    """
+    Тестирует, что ошибка запроса (4xx) возвращается сразу, без обращения к другим источникам.
+    """
+    invalid = StubProvider('first', error=HTTPException(status_code=400))
+    backup = StubProvider('backup', result={'success': True})
+    router = ProviderRouter([invalid, backup], window=10, max_error_rate=0.5)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await router.call(lambda provider: provider.currencies(None))
+
+    assert exc_info.value.status_code == 400
+    assert backup.calls == 0
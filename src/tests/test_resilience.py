@@ -0,0 +1,61 @@
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from src.currency.resilience import CircuitBreaker, LatencyTracker, RetryPolicy
+
+
+def test_circuit_breaker_opens_and_recovers_after_probe():
+    """
+    Тестирует размыкание автомата после серии ошибок и замыкание после успешного пробного запроса.
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.check()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with pytest.raises(HTTPException) as exc_info:
+        breaker.check()
+    assert exc_info.value.status_code == 503
+    assert breaker.stats()['state'] == 'open'
+
+    time.sleep(0.06)
+    breaker.check()
+    with pytest.raises(HTTPException):
+        breaker.check()
+
+    breaker.record_success()
+    assert breaker.stats() == {'state': 'closed', 'failures': 0, 'opened': 1, 'rejected': 2}
+
+
+def test_retry_policy_retries_only_transient_errors():
+    """
+    Тестирует, что повторяются сетевые ошибки и 5xx, но не 4xx, а задержка ограничена сверху.
+    """
+    policy = RetryPolicy(retries=2, backoff=1, max_backoff=1.5)
+    request = httpx.Request('GET', 'https://api.example.com')
+
+    def status_error(code: int) -> httpx.HTTPStatusError:
+        return httpx.HTTPStatusError('error', request=request, response=httpx.Response(code))
+
+    assert policy.should_retry(0, httpx.ConnectError('boom'))
+    assert policy.should_retry(1, status_error(503))
+    assert not policy.should_retry(2, status_error(503))
+    assert not policy.should_retry(0, status_error(404))
+    assert all(0 <= policy.delay(attempt) <= 1.5 for attempt in range(5))
+
+
+def test_latency_tracker_percentile():
+    """
+    Тестирует расчёт перцентиля только после накопления минимального числа замеров.
+    """
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for ms in range(1, 10):
+        tracker.record(ms / 1000)
+    assert tracker.percentile(95) is None
+
+    tracker.record(0.01)
+    assert tracker.percentile(50) == 0.006
+    assert tracker.percentile(95) == 0.01
@@ -0,0 +1,70 @@
+import asyncio
+
+import orjson
+import pytest
+
+from src.currency.stream import RateBroadcaster, Subscription, rate_broadcaster, sse_events
+
+
+RATES = {
+    'success': True,
+    'timestamp': 1747256405,
+    'source': 'USD',
+    'quotes': {'USDEUR': 0.89499, 'USDRUB': 80.374049},
+}
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_fans_out_one_poll(mock_send_request_for_rates, api_client):
+    """
+    Тестирует, что множество подписчиков обслуживается одним опросом внешнего API.
+    """
+    broadcaster = RateBroadcaster(interval=60, max_subscribers=100)
+    subscriptions = [broadcaster.subscribe('USD', ['EUR'], api_client) for _ in range(50)]
+
+    updates = await asyncio.gather(*(subscription.next() for subscription in subscriptions))
+
+    assert updates[0] == {'source': 'USD', 'timestamp': 1747256405, 'quotes': {'USDEUR': 0.89499}}
+    assert all(update == updates[0] for update in updates)
+    mock_send_request_for_rates.assert_awaited_once()
+
+    for subscription in subscriptions:
+        broadcaster.unsubscribe(subscription)
+    assert broadcaster.stats()['sources'] == []
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_publishes_only_changes_and_conflates():
+    """
+    Тестирует отправку только изменившихся курсов и слияние обновлений для медленного клиента.
+    """
+    broadcaster = RateBroadcaster(interval=60, max_subscribers=100)
+    subscription = Subscription('USD', None)
+    broadcaster._subscribers['USD'] = {subscription}
+
+    broadcaster.publish(RATES)
+    broadcaster.publish({**RATES, 'timestamp': 1747256465, 'quotes': {'USDEUR': 0.9, 'USDRUB': 80.374049}})
+    broadcaster.publish({**RATES, 'timestamp': 1747256525, 'quotes': {'USDEUR': 0.91, 'USDRUB': 80.374049}})
+
+    update = await subscription.next()
+    assert update == {'source': 'USD', 'timestamp': 1747256525, 'quotes': {'USDEUR': 0.91, 'USDRUB': 80.374049}}
+    assert subscription.conflated == 2
+
+    broadcaster.publish({**RATES, 'timestamp': 1747256585, 'quotes': {'USDEUR': 0.91, 'USDRUB': 81.0}})
+    assert (await subscription.next())['quotes'] == {'USDRUB': 81.0}
+
+
+@pytest.mark.asyncio
+async def test_sse_events_format_and_unsubscribe(mock_send_request_for_rates, api_client):
+    """
+    Тестирует формат событий SSE и снятие подписки при закрытии потока.
+    """
+    events = sse_events('USD', ['RUB'], api_client, keepalive=60)
+    event = await events.__anext__()
+
+    assert event.startswith(b'event: rates\ndata: ')
+    assert orjson.loads(event.split(b'data: ')[1])['quotes'] == {'USDRUB': 80.374049}
+    assert rate_broadcaster.stats()['subscribers'] == 1
+
+    await events.aclose()
+    assert rate_broadcaster.stats()['subscribers'] == 0
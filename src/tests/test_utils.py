@@ -1,13 +1,19 @@
+import asyncio
 from unittest.mock import patch, AsyncMock, MagicMock
 
+import httpx
 import pytest
+from fastapi import HTTPException
 
+from src.config import settings
+from src.currency.resilience import retry_policy, upstream_breaker, upstream_latency
 from src.currency.utils import (
     send_request,
     fetch_currencies,
     fetch_currency_rate,
     convert_currency,
 )
+from src.main import app
 
 
 @pytest.mark.asyncio
@@ -24,20 +30,133 @@ async def test_send_request_success():
         mock_get.return_value = mock_response
 
         url = 'https://api.example.com'
-        headers = {'apikey': 'test'}
-        response = await send_request(url, headers)
+        async with httpx.AsyncClient(headers={'apikey': 'test'}) as client:
+            response = await send_request(url, client)
 
         assert response == expected_response
-        mock_get.assert_called_once_with(url, headers=headers, params=None)
+        mock_get.assert_called_once_with(url, params=None)
 
 
 @pytest.mark.asyncio
-async def test_fetch_currencies_success(mock_send_request_for_currencies):
+async def test_send_request_coalesces_identical_requests():
+    """
+    Тестирует, что одновременные одинаковые запросы отправляются во внешний API один раз.
+    """
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'success': True}
+        return mock_response
+
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock, side_effect=slow_get) as mock_get:
+        url = 'https://api.example.com/live'
+        async with httpx.AsyncClient() as client:
+            responses = await asyncio.gather(
+                *(send_request(url, client, {'source': 'USD', 'currencies': None}) for _ in range(10)),
+                send_request(url, client, {'source': 'EUR'}),
+            )
+
+    assert responses == [{'success': True}] * 11
+    assert mock_get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_send_request_retries_and_opens_breaker():
+    """
+    Тестирует повтор запроса после сетевой ошибки и быстрый отказ 503 при разомкнутом автомате.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {'success': True}
+    side_effect = [httpx.ConnectError('boom'), mock_response]
+
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock, side_effect=side_effect) as mock_get, \
+            patch.object(retry_policy, 'backoff', 0):
+        async with httpx.AsyncClient() as client:
+            assert await send_request('https://api.example.com', client) == {'success': True}
+            assert mock_get.await_count == 2
+
+            mock_get.side_effect = httpx.ConnectError('boom')
+            for _ in range(upstream_breaker.failure_threshold):
+                with pytest.raises(HTTPException):
+                    await send_request('https://api.example.com', client)
+            calls = mock_get.await_count
+
+            with pytest.raises(HTTPException) as exc_info:
+                await send_request('https://api.example.com', client)
+
+    assert exc_info.value.status_code == 503
+    assert mock_get.await_count == calls
+    assert upstream_breaker.stats()['state'] == 'open'
+
+
+def status_response(code: int, url: str = 'https://api.example.com') -> httpx.Response:
+    """Ответ внешнего API с заданным статусом."""
+    return httpx.Response(code, json={'success': code < 400}, request=httpx.Request('GET', url))
+
+
+@pytest.mark.asyncio
+async def test_breaker_counts_429_and_ignores_client_errors():
+    """
+    Тестирует, что 429 вперемешку с 5xx размыкает автомат, а прочие 4xx не сбрасывают серию ошибок.
+    """
+    codes = [503, 400, 429] * upstream_breaker.failure_threshold
+    side_effect = [status_response(code) for code in codes]
+
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock, side_effect=side_effect), \
+            patch.object(retry_policy, 'retries', 0):
+        async with httpx.AsyncClient() as client:
+            for code in codes:
+                if upstream_breaker.state == 'open':
+                    break
+                with pytest.raises(HTTPException) as exc_info:
+                    await send_request('https://api.example.com', client)
+                assert exc_info.value.status_code == code
+
+    assert upstream_breaker.stats()['state'] == 'open'
+    assert upstream_breaker.stats()['failures'] == upstream_breaker.failure_threshold
+
+
+@pytest.mark.asyncio
+async def test_send_request_hedges_slow_request():
+    """
+    Тестирует hedged-запрос: второй запрос уходит после задержки, побеждает первый ответ,
+    а проигравший запрос отменяется.
+    """
+    cancelled = asyncio.Event()
+
+    async def get(*args, **kwargs):
+        if get.calls == 0:
+            get.calls += 1
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        get.calls += 1
+        return status_response(200)
+
+    get.calls = 0
+    for _ in range(upstream_latency.min_samples):
+        upstream_latency.record(0.01)
+
+    with patch('httpx.AsyncClient.get', new=get), \
+            patch.object(settings, 'CURRENCY_API_HEDGE_ENABLED', True), \
+            patch.object(settings, 'CURRENCY_API_HEDGE_MIN_DELAY', 0.01):
+        async with httpx.AsyncClient() as client:
+            response = await asyncio.wait_for(send_request('https://api.example.com', client), timeout=1)
+
+    assert response == {'success': True}
+    assert get.calls == 2
+    assert upstream_latency.stats()['hedged'] == 1
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_fetch_currencies_success(mock_send_request_for_currencies, api_client):
     """
     Тестирует функцию fetch_currencies на успешное получение списка валют.
     """
-    headers = {'api_key': 'test_key'}
-    currencies_response = await fetch_currencies(headers)
+    currencies_response = await fetch_currencies(api_client)
 
     assert currencies_response['success'] is True
     assert 'currencies' in currencies_response
@@ -48,15 +167,14 @@ async def test_fetch_currencies_success(mock_send_request_for_currencies):
 
 
 @pytest.mark.asyncio
-async def test_fetch_currency_rate_success(mock_send_request_for_rates):
+async def test_fetch_currency_rate_success(mock_send_request_for_rates, api_client):
     """
     Тестирует функцию fetch_currency_rate на успешное получение курсов валют.
     """
-    headers = {'api_key': 'test_key'}
     currency_rate_response = await fetch_currency_rate(
         source='USD',
         currencies='RUB,EUR',
-        headers=headers
+        client=api_client
     )
 
     assert currency_rate_response['success'] is True
@@ -71,16 +189,15 @@ async def test_fetch_currency_rate_success(mock_send_request_for_rates):
 
 
 @pytest.mark.asyncio
-async def test_convert_currency_success(mock_send_request_for_convert):
+async def test_convert_currency_success(mock_send_request_for_convert, api_client):
     """
     Тестирует функцию convert_currency на успешную конвертацию валюты.
     """
-    headers = {'api_key': 'test_key'}
     conversion_response = await convert_currency(
         amount=2,
         from_currency='USD',
         to_currency='EUR',
-        headers=headers
+        client=api_client
     )
 
     assert conversion_response['success'] is True
@@ -89,3 +206,17 @@ async def test_convert_currency_success(mock_send_request_for_convert):
     assert conversion_response['query']['to'] == 'EUR'
     assert isinstance(conversion_response['query'], dict)
     mock_send_request_for_convert.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_creates_shared_api_client():
+    """
+    Тестирует, что lifespan создаёт один общий клиент API и закрывает его при остановке.
+    """
+    async with app.router.lifespan_context(app):
+        client = app.state.api_client
+        assert isinstance(client, httpx.AsyncClient)
+        assert client.headers['apikey']
+        assert not client.is_closed
+
+    assert client.is_closed